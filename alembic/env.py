@@ -11,16 +11,29 @@ import sys
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from app.config import Config
 from app.models import Base, User, Folder, Note
 
 config = context.config
 
+if not config.get_main_option("sqlalchemy.url"):
+    config.set_main_option("sqlalchemy.url", Config.DB_URL)
+
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 target_metadata = Base.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # Полнотекстовый индекс заметок создаётся вручную (0003_note_search, 0006_note_compression)
+    if type_ == "table" and name.startswith("notes_fts"):
+        return False
+    if name in ("search_vector", "ix_notes_search"):
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
 
     url = config.get_main_option("sqlalchemy.url")
@@ -29,6 +42,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -49,6 +63,7 @@ def run_migrations_online() -> None:
             target_metadata=target_metadata,
             compare_type=True,
             compare_server_default=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
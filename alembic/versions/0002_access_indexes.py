@@ -0,0 +1,34 @@
+"""composite indexes for list queries
+
+Revision ID: 0002_access_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_access_indexes'
+down_revision: Union[str, None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_notes_owner_folder', 'notes', ['owner_id', 'folder_id', 'updated_at'])
+    op.create_index('ix_notes_owner_updated', 'notes', ['owner_id', 'updated_at'])
+    op.create_index('ix_notes_updated_at', 'notes', ['updated_at'])
+    op.create_index('ix_folders_owner_updated', 'folders', ['owner_id', 'updated_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_folders_owner_updated', table_name='folders')
+    op.drop_index('ix_notes_updated_at', table_name='notes')
+    op.drop_index('ix_notes_owner_updated', table_name='notes')
+    op.drop_index('ix_notes_owner_folder', table_name='notes')
@@ -0,0 +1,72 @@
+"""full-text search over notes
+
+Revision ID: 0003_note_search
+Revises: 0002_access_indexes
+Create Date: 2026-10-18 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_note_search'
+down_revision: Union[str, None] = '0002_access_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE notes_fts USING fts5(name, text, content='notes', content_rowid='id')",
+    "CREATE TRIGGER notes_fts_ai AFTER INSERT ON notes BEGIN "
+    "INSERT INTO notes_fts(rowid, name, text) VALUES (new.id, new.name, new.text); END",
+    "CREATE TRIGGER notes_fts_ad AFTER DELETE ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, name, text) VALUES ('delete', old.id, old.name, old.text); END",
+    "CREATE TRIGGER notes_fts_au AFTER UPDATE OF name, text ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, name, text) VALUES ('delete', old.id, old.name, old.text); "
+    "INSERT INTO notes_fts(rowid, name, text) VALUES (new.id, new.name, new.text); END",
+    "INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS notes_fts_au",
+    "DROP TRIGGER IF EXISTS notes_fts_ad",
+    "DROP TRIGGER IF EXISTS notes_fts_ai",
+    "DROP TABLE IF EXISTS notes_fts",
+]
+
+POSTGRES_UPGRADE = [
+    "ALTER TABLE notes ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+    "(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(text, ''))) STORED",
+    "CREATE INDEX ix_notes_search ON notes USING GIN (search_vector)",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_notes_search",
+    "ALTER TABLE notes DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(statements) -> None:
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _run(SQLITE_UPGRADE)
+    elif dialect == 'postgresql':
+        _run(POSTGRES_UPGRADE)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _run(SQLITE_DOWNGRADE)
+    elif dialect == 'postgresql':
+        _run(POSTGRES_DOWNGRADE)
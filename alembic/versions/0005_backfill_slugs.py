@@ -0,0 +1,65 @@
+"""replace random short slugs with time-ordered base62 ids
+
+Revision ID: 0005_backfill_slugs
+Revises: 0004_entity_versions
+Create Date: 2026-10-18 12:00:00
+
+"""
+import secrets
+import time
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_backfill_slugs'
+down_revision: Union[str, None] = '0004_entity_versions'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BATCH_SIZE = 1000
+BASE62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+SLUG_ID_LENGTH = 22
+
+# Копия app/slugs.py: миграция не должна зависеть от кода приложения
+def _slug_id() -> str:
+    number = ((time.time_ns() // 1_000_000) << 80) | secrets.randbits(80)
+    chars = []
+    while number:
+        number, rest = divmod(number, 62)
+        chars.append(BASE62[rest])
+    return "".join(reversed(chars)).rjust(SLUG_ID_LENGTH, BASE62[0])
+
+
+def _backfill(table: str, prefix: str) -> None:
+    bind = op.get_bind()
+    new_length = len(prefix) + 1 + SLUG_ID_LENGTH
+    select_old = sa.text(
+        f"SELECT id FROM {table} WHERE length(slug) <> :length AND id > :last_id ORDER BY id LIMIT :limit"
+    )
+    update = sa.text(f"UPDATE {table} SET slug = :slug WHERE id = :id")
+
+    last_id = 0
+    while True:
+        ids = bind.execute(
+            select_old, {"length": new_length, "last_id": last_id, "limit": BATCH_SIZE}
+        ).scalars().all()
+        if not ids:
+            break
+        bind.execute(update, [{"id": row_id, "slug": f"{prefix}_{_slug_id()}"} for row_id in ids])
+        last_id = ids[-1]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _backfill('notes', 'note')
+    _backfill('folders', 'folder')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Старые случайные slug не восстановить, новые остаются валидными
+    pass
@@ -0,0 +1,77 @@
+"""full-text index reads note bodies through note_text()
+
+Revision ID: 0006_note_compression
+Revises: 0005_backfill_slugs
+Create Date: 2026-10-18 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_note_compression'
+down_revision: Union[str, None] = '0005_backfill_slugs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Сжатие тел заметок касается только SQLite: FTS5 должен индексировать
+# распакованный текст. Функцию note_text регистрирует app.models.types,
+# сами строки пережимает python -m app.recompress.
+DROP_SQLITE_SEARCH = [
+    "DROP TRIGGER IF EXISTS notes_fts_au",
+    "DROP TRIGGER IF EXISTS notes_fts_ad",
+    "DROP TRIGGER IF EXISTS notes_fts_ai",
+    "DROP TABLE IF EXISTS notes_fts",
+    "DROP VIEW IF EXISTS notes_plain",
+]
+
+SQLITE_UPGRADE = DROP_SQLITE_SEARCH + [
+    "CREATE VIEW notes_plain AS SELECT id, name, note_text(text) AS text FROM notes",
+    "CREATE VIRTUAL TABLE notes_fts USING fts5(name, text, content='notes_plain', content_rowid='id')",
+    "CREATE TRIGGER notes_fts_ai AFTER INSERT ON notes BEGIN "
+    "INSERT INTO notes_fts(rowid, name, text) VALUES (new.id, new.name, note_text(new.text)); END",
+    "CREATE TRIGGER notes_fts_ad AFTER DELETE ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, name, text) "
+    "VALUES ('delete', old.id, old.name, note_text(old.text)); END",
+    "CREATE TRIGGER notes_fts_au AFTER UPDATE OF name, text ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, name, text) "
+    "VALUES ('delete', old.id, old.name, note_text(old.text)); "
+    "INSERT INTO notes_fts(rowid, name, text) VALUES (new.id, new.name, note_text(new.text)); END",
+    "INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    # Сначала распаковываем всё сжатое, пока триггеры ещё понимают BLOB
+    "UPDATE notes SET text = note_text(text) WHERE typeof(text) = 'blob'",
+] + DROP_SQLITE_SEARCH + [
+    "CREATE VIRTUAL TABLE notes_fts USING fts5(name, text, content='notes', content_rowid='id')",
+    "CREATE TRIGGER notes_fts_ai AFTER INSERT ON notes BEGIN "
+    "INSERT INTO notes_fts(rowid, name, text) VALUES (new.id, new.name, new.text); END",
+    "CREATE TRIGGER notes_fts_ad AFTER DELETE ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, name, text) VALUES ('delete', old.id, old.name, old.text); END",
+    "CREATE TRIGGER notes_fts_au AFTER UPDATE OF name, text ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, name, text) VALUES ('delete', old.id, old.name, old.text); "
+    "INSERT INTO notes_fts(rowid, name, text) VALUES (new.id, new.name, new.text); END",
+    "INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')",
+]
+
+
+def _run(statements) -> None:
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        _run(SQLITE_UPGRADE)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        _run(SQLITE_DOWNGRADE)
@@ -0,0 +1,85 @@
+"""per-user change sequence and tombstones for delta sync
+
+Revision ID: 0007_change_sync
+Revises: 0006_note_compression
+Create Date: 2026-10-18 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007_change_sync'
+down_revision: Union[str, None] = '0006_note_compression'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _drop_change_seq(table: str) -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        # batch-режим пересоздал бы notes и потерял триггеры FTS (0006)
+        op.execute(f"ALTER TABLE {table} DROP COLUMN change_seq")
+    else:
+        op.drop_column(table, 'change_seq')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('change_seq', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('folders', sa.Column('change_seq', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_notes_owner_change_seq', 'notes', ['owner_id', 'change_seq'], unique=False)
+    op.create_index('ix_folders_owner_change_seq', 'folders', ['owner_id', 'change_seq'], unique=False)
+
+    op.create_table(
+        'tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=16), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('change_seq', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_tombstones_owner_seq', 'tombstones', ['owner_id', 'change_seq'], unique=False)
+    op.create_index('ix_tombstones_deleted_at', 'tombstones', ['deleted_at'], unique=False)
+
+    # Всё, что уже есть, получает свои номера в последовательности владельца:
+    # сначала папки, затем заметки. Счётчик владельца - последний выданный номер
+    op.execute(
+        "UPDATE folders SET change_seq = ("
+        "SELECT numbered.seq FROM ("
+        "SELECT id, ROW_NUMBER() OVER (PARTITION BY owner_id ORDER BY id) AS seq FROM folders"
+        ") AS numbered WHERE numbered.id = folders.id)"
+    )
+    op.execute(
+        "UPDATE notes SET change_seq = ("
+        "SELECT numbered.seq FROM ("
+        "SELECT id, ROW_NUMBER() OVER (PARTITION BY owner_id ORDER BY id) AS seq FROM notes"
+        ") AS numbered WHERE numbered.id = notes.id"
+        ") + (SELECT COUNT(*) FROM folders WHERE folders.owner_id = notes.owner_id)"
+    )
+    op.execute(
+        "INSERT INTO entity_versions (key, version) "
+        "SELECT 'user:' || id || '\\:changes', "
+        "(SELECT COUNT(*) FROM folders WHERE folders.owner_id = users.id) "
+        "+ (SELECT COUNT(*) FROM notes WHERE notes.owner_id = users.id) FROM users"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "DELETE FROM entity_versions "
+        "WHERE key LIKE 'user:%\\:changes' OR key LIKE 'user:%\\:sync_horizon'"
+    )
+    op.drop_index('ix_tombstones_deleted_at', table_name='tombstones')
+    op.drop_index('ix_tombstones_owner_seq', table_name='tombstones')
+    op.drop_table('tombstones')
+    op.drop_index('ix_folders_owner_change_seq', table_name='folders')
+    op.drop_index('ix_notes_owner_change_seq', table_name='notes')
+    _drop_change_seq('folders')
+    _drop_change_seq('notes')
@@ -0,0 +1,32 @@
+"""version column on notes for optimistic concurrency
+
+Revision ID: 0008_note_version
+Revises: 0007_change_sync
+Create Date: 2026-10-18 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008_note_version'
+down_revision: Union[str, None] = '0007_change_sync'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        # batch-режим пересоздал бы notes и потерял триггеры FTS (0006)
+        op.execute("ALTER TABLE notes DROP COLUMN version")
+    else:
+        op.drop_column('notes', 'version')
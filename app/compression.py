@@ -0,0 +1,54 @@
+import zlib
+from typing import Optional, Union
+
+from app.config import Config
+
+# Сжатое тело хранится как BLOB с этим префиксом, обычное - как текст.
+# Старые строки без префикса читаются как есть.
+MARKER = b"NZ\x01"
+
+
+def compress_text(value: Optional[str], threshold: Optional[int] = None) -> Union[str, bytes, None]:
+    if value is None:
+        return None
+
+    threshold = Config.NOTE_COMPRESS_THRESHOLD if threshold is None else threshold
+    raw = value.encode("utf-8")
+    if len(raw) < threshold:
+        return value
+
+    compressed = MARKER + zlib.compress(raw, Config.NOTE_COMPRESS_LEVEL)
+    # Несжимаемые данные выгоднее оставить текстом
+    return compressed if len(compressed) < len(raw) else value
+
+
+def decompress_text(value: Union[str, bytes, None]) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if value.startswith(MARKER):
+        return zlib.decompress(value[len(MARKER):]).decode("utf-8")
+    return value.decode("utf-8")
+
+
+def text_preview(value: Union[str, bytes, None], length: int) -> Optional[str]:
+    """Начало тела без распаковки целиком - для превью в списках"""
+    if value is None or isinstance(value, str) or not value.startswith(MARKER):
+        text = decompress_text(value)
+        return None if text is None else text[:length]
+
+    # Символ UTF-8 занимает до 4 байт - распаковываем с запасом
+    head = zlib.decompressobj().decompress(value[len(MARKER):], length * 4)
+    return head.decode("utf-8", errors="ignore")[:length]
+
+
+def register_sqlite_functions(dbapi_connection, connection_record):
+    """
+    SQL-функции для SQLite: через них триггеры полнотекстового индекса и
+    превью видят распакованный текст. Без них запись в notes упадёт с
+    "no such function: note_text".
+    """
+    create_function = getattr(dbapi_connection, "create_function", None)
+    if create_function is None:
+        return
+    create_function("note_text", 1, decompress_text, deterministic=True)
+    create_function("note_preview", 2, text_preview, deterministic=True)
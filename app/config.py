@@ -6,8 +6,47 @@ load_dotenv()
 class Config:
     URL = "http://127.0.0.1:8000"
     DB_URL = os.getenv("DB_URL")
+    # Реплика для чтения (get_read_db); без неё всё читается с DB_URL
+    DB_REPLICA_URL = os.getenv("DB_REPLICA_URL")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+    READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
     SECRET_KEY = os.getenv("SECRET_KEY")
     ALGORITHM = os.getenv("ALGORITHM")
     MINUTES = 1
     REFRESH_TOKEN_DAYS = 7
-    TOKEN_MIN_EXEPT = 1
\ No newline at end of file
+    TOKEN_MIN_EXEPT = 1
+    PAGE_SIZE = int(os.getenv("PAGE_SIZE", 50))
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 500))
+
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", 2))
+    HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", 32))
+    PREVIEW_LENGTH = int(os.getenv("PREVIEW_LENGTH", 120))
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+    IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", 16 * 1024 * 1024))
+    IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 100))
+    BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 500))
+    BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", 100))
+    NOTE_COMPRESS_THRESHOLD = int(os.getenv("NOTE_COMPRESS_THRESHOLD", 1024))
+    NOTE_COMPRESS_LEVEL = int(os.getenv("NOTE_COMPRESS_LEVEL", 6))
+    SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", 30))
+    SYNC_COMPACT_INTERVAL = int(os.getenv("SYNC_COMPACT_INTERVAL", 3600))
+    EVENT_BROKER = os.getenv("EVENT_BROKER", "app.events:InMemoryBroker")
+    EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 100))
+    EVENTS_KEEPALIVE = int(os.getenv("EVENTS_KEEPALIVE", 15))
+    NOTE_PATCH_MAX_OPERATIONS = int(os.getenv("NOTE_PATCH_MAX_OPERATIONS", 200))
+    NOTE_REVISION_SNAPSHOT_EVERY = int(os.getenv("NOTE_REVISION_SNAPSHOT_EVERY", 50))
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+    N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))
+    QUERY_DEBUG_HEADERS = os.getenv("QUERY_DEBUG_HEADERS", "0") == "1"
+    PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+    PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 60))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 50))
@@ -1,17 +1,182 @@
-from sqlalchemy import create_engine
+import asyncio
+import time
+
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from app import metrics, query_log
 from app.config import Config
 
-engine = create_engine(Config.DB_URL, connect_args={"check_same_thread": False})
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    db_url = make_url(url)
+    backend = db_url.get_backend_name()
+    if db_url.drivername == backend and backend in ASYNC_DRIVERS:
+        db_url = db_url.set(drivername=ASYNC_DRIVERS[backend])
+    return db_url.render_as_string(hide_password=False)
+
+
+def engine_options(url: str, is_async: bool = True) -> dict:
+    """Настройки пула из Config для движка на url"""
+    db_url = make_url(url)
+    options = {}
+    if db_url.get_backend_name() == "sqlite":
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        if db_url.database in (None, "", ":memory:"):
+            # База в памяти живёт в одном соединении - пул не настраивается
+            return options
+    else:
+        # У файла SQLite нет соединения, которое мог бы оборвать сервер
+        options["pool_pre_ping"] = Config.DB_POOL_PRE_PING
+
+    options.update(
+        pool_size=Config.DB_POOL_SIZE,
+        max_overflow=Config.DB_MAX_OVERFLOW,
+        pool_timeout=Config.DB_POOL_TIMEOUT,
+        pool_recycle=Config.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+# Синхронный движок остаётся для alembic и служебных скриптов
+engine = create_engine(Config.DB_URL, **engine_options(Config.DB_URL, is_async=False))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(to_async_url(Config.DB_URL), **engine_options(Config.DB_URL))
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+if Config.DB_REPLICA_URL:
+    replica_engine = create_async_engine(
+        to_async_url(Config.DB_REPLICA_URL), **engine_options(Config.DB_REPLICA_URL)
+    )
+    ReadSessionLocal = async_sessionmaker(
+        replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+else:
+    replica_engine = async_engine
+    ReadSessionLocal = AsyncSessionLocal
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Один замер на запрос: его получают и /metrics, и счётчик HTTP-запроса
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    metrics.observe_query(statement, elapsed)
+    query_log.record(statement, parameters, elapsed, executemany)
+
+
+def _handle_error(exception_context):
+    # Упавший запрос не доходит до after_cursor_execute - снимаем его отметку
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+# Число и длительность SQL-запросов для /metrics, счётчик на HTTP-запрос
+# и журнал медленных запросов (app.query_log)
+for _engine in {engine, async_engine.sync_engine, replica_engine.sync_engine}:
+    event.listen(_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(_engine, "handle_error", _handle_error)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# user_id -> time.monotonic() последнего коммита с его изменениями, старые первыми
+_last_writes = {}
+
+
+def mark_written(user_ids):
+    """
+    Отмечает коммит с изменениями пользователей: READ_YOUR_WRITES_SECONDS
+    после него их чтения идут на основную базу, а не на отстающую реплику.
+    Отметки живут в памяти процесса.
+    """
+    now = time.monotonic()
+    for user_id in user_ids:
+        _last_writes.pop(user_id, None)
+        _last_writes[user_id] = now
+
+    while _last_writes:
+        oldest = next(iter(_last_writes))
+        if now - _last_writes[oldest] < Config.READ_YOUR_WRITES_SECONDS:
+            break
+        del _last_writes[oldest]
+
+
+def read_sessionmaker(user_id=None):
+    """Фабрика сессий для чтения: реплика, если пользователь недавно ничего не менял"""
+    if ReadSessionLocal is AsyncSessionLocal or user_id is None:
+        return ReadSessionLocal
+
+    written = _last_writes.get(user_id)
+    if written is not None and time.monotonic() - written < Config.READ_YOUR_WRITES_SECONDS:
+        return AsyncSessionLocal
+    return ReadSessionLocal
+
+
+def request_user_id(request: Request):
+    # Подпись не проверяется: от id зависит только выбор базы, доступ
+    # проверяет сам маршрут
+    token = request.cookies.get("access_token") or request.query_params.get("token")
+    if not token:
+        return None
     try:
+        return jwt.get_unverified_claims(token).get("id")
+    except JWTError:
+        return None
+
+
+async def get_read_db(request: Request):
+    """Сессия только для чтения - с реплики (read_sessionmaker)"""
+    async with read_sessionmaker(request_user_id(request))() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+
+async def run_in_session(loader, *args, sessionmaker=AsyncSessionLocal):
+    async with sessionmaker() as db:
+        return await loader(db, *args)
+
+
+async def gather_in_sessions(*loads, user_id=None):
+    """
+    Выполняет независимые выборки параллельно, каждую в своей сессии:
+    одна AsyncSession не допускает конкурентных запросов. Выборки идут
+    на реплику с учётом недавних записей user_id (read_sessionmaker).
+
+        folders, notes = await gather_in_sessions(
+            (get_folders_by_user, user_id),
+            (get_notes_by_user, user_id),
+            user_id=user_id,
+        )
+    """
+    sessionmaker = read_sessionmaker(user_id)
+    return await asyncio.gather(*(
+        run_in_session(loader, *args, sessionmaker=sessionmaker) for loader, *args in loads
+    ))
+
+
+async def dispose_engines():
+    await async_engine.dispose()
+    if replica_engine is not async_engine:
+        await replica_engine.dispose()
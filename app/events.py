@@ -0,0 +1,75 @@
+import asyncio
+import importlib
+from collections import defaultdict
+
+from app.config import Config
+
+# Подписчик отстал и потерял сообщения - ему нужна полная синхронизация
+RESYNC = {"op": "resync"}
+
+
+class Broker:
+    """
+    Шина сообщений по каналам. publish - отправить всем подписчикам канала,
+    subscribe - асинхронный контекстный менеджер, отдающий объект с
+    async get(). Для нескольких воркеров нужна реализация поверх общего
+    бэкенда, она подключается через EVENT_BROKER="модуль:Класс".
+    """
+
+    async def publish(self, channel: str, message: dict):
+        raise NotImplementedError
+
+    def subscribe(self, channel: str):
+        raise NotImplementedError
+
+
+class InMemoryBroker(Broker):
+    """Шина внутри одного процесса: по очереди на каждого подписчика"""
+
+    def __init__(self, queue_size: int = Config.EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._channels = defaultdict(set)
+
+    async def publish(self, channel: str, message: dict):
+        for queue in list(self._channels.get(channel, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Медленный подписчик не тормозит остальных: накопленное
+                # выбрасывается, вместо него - просьба пересинхронизироваться
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    def subscribe(self, channel: str):
+        return _Subscription(self._channels, channel, self.queue_size)
+
+    def subscribers(self, channel: str) -> int:
+        return len(self._channels.get(channel, ()))
+
+
+class _Subscription:
+    # Отписка без await: её можно выполнить и при закрытии генератора
+    def __init__(self, channels, channel: str, queue_size: int):
+        self.channels = channels
+        self.channel = channel
+        self.queue = asyncio.Queue(queue_size)
+
+    async def __aenter__(self):
+        self.channels[self.channel].add(self.queue)
+        return self.queue
+
+    async def __aexit__(self, *exc_info):
+        subscribers = self.channels.get(self.channel)
+        if subscribers is not None:
+            subscribers.discard(self.queue)
+            if not subscribers:
+                del self.channels[self.channel]
+
+
+def load_broker(path: str) -> Broker:
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)()
+
+
+broker = load_broker(Config.EVENT_BROKER)
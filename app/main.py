@@ -1,18 +1,20 @@
-from datetime import datetime
-from typing import Annotated, Optional
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from typing import Optional
 
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from starlette import status
-from sqlalchemy.orm import Session
-from starlette.responses import HTMLResponse, RedirectResponse
+from starlette.responses import HTMLResponse, PlainTextResponse, RedirectResponse
 from starlette.requests import Request
-import httpx
 
+from app import metrics, profiler, query_log
 from app.config import Config
-from app.database import get_db
-from app.routers import note, auth, folders
+from app.database import dispose_engines, gather_in_sessions
+from app import services
+from app.routers import note, auth, folders, export, batch, sync, events, profiles
 from app.routers.auth import oauth2_scheme, auto_refresh_token
 
 from fastapi.templating import Jinja2Templates
@@ -20,13 +22,30 @@ from fastapi.templating import Jinja2Templates
 load_dotenv()
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    compaction = asyncio.create_task(services.run_tombstone_compaction())
+    yield
+    compaction.cancel()
+    with suppress(asyncio.CancelledError):
+        await compaction
+    await dispose_engines()
+
+
 app = FastAPI(
     title="FastAPI notes",
     description="API",
-    version="0.0.1"
+    version="0.0.1",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# Внутренний слой: профилирует в той же задаче, что и обработчик маршрута
+app.add_middleware(profiler.ProfilerMiddleware)
 app.middleware("http")(auto_refresh_token)
+app.add_middleware(query_log.QueryLogMiddleware)
+# Добавлен последним - внешний слой, меряет и работу auto_refresh_token
+app.add_middleware(metrics.MetricsMiddleware)
 
 templates = Jinja2Templates(directory='app/templates/')
 
@@ -35,12 +54,21 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 app.include_router(note.router, prefix="/note", tags=["note"])
 app.include_router(folders.router, prefix="/folder", tags=["folder"])
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
+app.include_router(export.router, prefix="/export", tags=["export"])
+app.include_router(batch.router, prefix="/batch", tags=["batch"])
+app.include_router(sync.router, prefix="/sync", tags=["sync"])
+app.include_router(events.router, prefix="/events", tags=["events"])
+app.include_router(profiles.router, prefix="/profiles", tags=["profiles"])
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/", response_class=HTMLResponse)
 async def main(
         request: Request,
-        db: Annotated[Session, Depends(get_db)],
         token: Optional[str] = None
 ):
     try:
@@ -53,25 +81,13 @@ async def main(
         user = auth.get_user_by_token(token=token)
         if not user:
             return RedirectResponse(url="/auth/create", status_code=status.HTTP_303_SEE_OTHER)
-      
-        async with httpx.AsyncClient() as client:
-            response_folders = await client.get(f"{Config.URL}/folder/by_user/{user['user_id']}/")
-            response_notes = await client.get(f"{Config.URL}/note/by_user/{user['user_id']}/")
-            response_folders.raise_for_status()
-            response_notes.raise_for_status()
-            folders = response_folders.json()
-            notes = response_notes.json()
-
-        for folder in folders:
-            dt = datetime.fromisoformat(folder["updated_at"])
-            folder["updated_at"] = dt.strftime("%Y-%m-%d %H:%M:%S")
-
-        
-        for note in notes:
-            dt = datetime.fromisoformat(note["updated_at"])
-            note["updated_at"] = dt.strftime("%Y-%m-%d %H:%M:%S")
-
-        
+
+        folders_page, notes_page = await gather_in_sessions(
+            (services.get_folders_by_user, user["user_id"], None, Config.PAGE_SIZE),
+            (services.get_notes_by_user, user["user_id"], None, Config.PAGE_SIZE, "summary"),
+            user_id=user["user_id"],
+        )
+
         return templates.TemplateResponse(
             "main.html",
             {
@@ -79,8 +95,10 @@ async def main(
                 "config": {"url": Config.URL},
                 "username": user["username"],
                 "user_id": user["user_id"],
-                "notes": notes,
-                "folders": folders
+                "notes": notes_page["items"],
+                "notes_cursor": notes_page["next_cursor"],
+                "folders": folders_page["items"],
+                "folders_cursor": folders_page["next_cursor"]
             }
 
         )
@@ -88,10 +106,8 @@ async def main(
     except HTTPException as e:
         if e.status_code == status.HTTP_401_UNAUTHORIZED:
             return RedirectResponse(url="/auth/create", status_code=status.HTTP_303_SEE_OTHER)
-        db.rollback()
         raise
     except Exception as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Произошла ошибка на сервере"
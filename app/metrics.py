@@ -0,0 +1,171 @@
+"""
+Метрики процесса в текстовом формате Prometheus (/metrics).
+
+Свой небольшой реестр вместо prometheus_client: счётчики, gauge и
+гистограммы с метками, без блокировок - всё меняется из потока цикла
+событий. Гистограмма хранит счётчики корзин без накопления, накопленные
+суммы считаются только при выдаче.
+"""
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+# Задержки HTTP и SQL, секунды
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+REGISTRY = []
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        REGISTRY.append(self)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self.samples()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        super().__init__(name, documentation, labels)
+        self.values = defaultdict(int)
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] += amount
+
+    def samples(self):
+        for label_values, value in list(self.values.items()):
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount=1):
+        self.values[label_values] -= amount
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=HTTP_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # по меткам: [счётчики корзин + корзина +Inf, сумма]
+        self.values = {}
+
+    def observe(self, value: float, *label_values):
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self):
+        bounds = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        for label_values, (counts, total) in list(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+http_requests = Counter(
+    "http_requests_total", "HTTP-запросы по маршруту и статусу", ("method", "route", "status"),
+)
+http_duration = Histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса", ("method", "route"),
+)
+http_in_progress = Gauge(
+    "http_requests_in_progress", "HTTP-запросы в обработке", ("method",),
+)
+db_queries = Counter(
+    "db_queries_total", "SQL-запросы по типу", ("operation",),
+)
+db_duration = Histogram(
+    "db_query_duration_seconds", "Время выполнения SQL-запроса", ("operation",), DB_BUCKETS,
+)
+token_cache_lookups = Counter(
+    "token_cache_lookups_total", "Проверки JWT по кэшу токенов: hit или miss", ("result",),
+)
+
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def sql_operation(statement: str) -> str:
+    operation = statement.lstrip()[:6].upper()
+    return operation if operation in SQL_OPERATIONS else "OTHER"
+
+
+def observe_query(statement: str, elapsed: float):
+    operation = sql_operation(statement)
+    db_queries.inc(operation)
+    db_duration.observe(elapsed, operation)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: задержка, статус и число запросов в обработке.
+    Маршрут берётся шаблоном (/note/{note_id}/), а не путём, чтобы число
+    рядов не росло с числом id. Время считается до последнего байта
+    ответа, для потоков (/events/, экспорт) это время жизни потока.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_progress.inc(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_progress.dec(method)
+            route = scope.get("route")
+            path = route.path if route is not None else "other"
+            http_requests.inc(method, path, status_code)
+            http_duration.observe(time.perf_counter() - started, method, path)
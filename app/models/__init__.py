@@ -1,7 +1,10 @@
 from .users import User
 from .notes import Note
 from .folders import Folder
+from .versions import EntityVersion
+from .tombstones import Tombstone
+from .revisions import NoteRevision
 
 from app.database import Base
 
-__all__ = ['Base', 'User', 'Note', 'Folder']
\ No newline at end of file
+__all__ = ['Base', 'User', 'Note', 'Folder', 'EntityVersion', 'Tombstone', 'NoteRevision']
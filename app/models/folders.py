@@ -1,11 +1,15 @@
 from app.database import Base
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from datetime import datetime
 
 class Folder(Base):
     __tablename__ = "folders"
+    __table_args__ = (
+        Index("ix_folders_owner_updated", "owner_id", "updated_at"),
+        Index("ix_folders_owner_change_seq", "owner_id", "change_seq"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey('users.id'))
@@ -17,6 +21,9 @@ class Folder(Base):
     is_public = Column(Boolean, default=False)
     password_check = Column(Boolean, default=False)
     hash_password = Column(String)
+    # Номер изменения в последовательности владельца (app.services.sync)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
 
     owner = relationship('User', back_populates='folders')
-    notes = relationship('Note', back_populates='folder')
\ No newline at end of file
+    # Заметки удаляемой папки освобождает одним UPDATE хук в app.services.sync
+    notes = relationship('Note', back_populates='folder', passive_deletes=True)
\ No newline at end of file
@@ -1,24 +1,68 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index, DDL, event
 from sqlalchemy.orm import relationship
 
 from datetime import datetime
 
 from app.database import Base
+from app.models.types import CompressedText
 
 
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        Index("ix_notes_owner_folder", "owner_id", "folder_id", "updated_at"),
+        Index("ix_notes_owner_updated", "owner_id", "updated_at"),
+        Index("ix_notes_updated_at", "updated_at"),
+        Index("ix_notes_owner_change_seq", "owner_id", "change_seq"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey('users.id'))
     folder_id = Column(Integer, ForeignKey('folders.id'), nullable=True)
     slug = Column(String, unique=True, nullable=False)
-    text = Column(String)
+    text = Column(CompressedText)
     created_at = Column(DateTime, default=lambda: datetime.utcnow())
     name = Column(String)
     updated_at = Column(DateTime, default=lambda: datetime.utcnow())
     is_public = Column(Boolean, default=False)
+    # Номер изменения в последовательности владельца (app.services.sync)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
+    # Версия для оптимистичной блокировки: каждый ORM-UPDATE идёт с
+    # WHERE version = <прочитанная> и увеличивает её (app.services.edits)
+    version = Column(Integer, nullable=False, server_default="1")
 
     owner = relationship('User', back_populates='notes')
-    folder = relationship('Folder', back_populates='notes')
\ No newline at end of file
+    folder = relationship('Folder', back_populates='notes')
+
+    __mapper_args__ = {"version_id_col": version}
+
+# Полнотекстовый индекс живёт вне ORM: в SQLite это FTS5-таблица с
+# триггерами, в Postgres - генерируемая колонка tsvector с GIN-индексом.
+# Тело заметки в SQLite может быть сжато, поэтому FTS5 читает его через
+# представление notes_plain и функцию note_text (app.compression).
+# Тот же DDL накатывают миграции 0003_note_search и 0006_note_compression.
+SQLITE_SEARCH_DDL = [
+    "CREATE VIEW notes_plain AS SELECT id, name, note_text(text) AS text FROM notes",
+    "CREATE VIRTUAL TABLE notes_fts USING fts5(name, text, content='notes_plain', content_rowid='id')",
+    "CREATE TRIGGER notes_fts_ai AFTER INSERT ON notes BEGIN "
+    "INSERT INTO notes_fts(rowid, name, text) VALUES (new.id, new.name, note_text(new.text)); END",
+    "CREATE TRIGGER notes_fts_ad AFTER DELETE ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, name, text) "
+    "VALUES ('delete', old.id, old.name, note_text(old.text)); END",
+    "CREATE TRIGGER notes_fts_au AFTER UPDATE OF name, text ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, name, text) "
+    "VALUES ('delete', old.id, old.name, note_text(old.text)); "
+    "INSERT INTO notes_fts(rowid, name, text) VALUES (new.id, new.name, note_text(new.text)); END",
+]
+
+POSTGRES_SEARCH_DDL = [
+    "ALTER TABLE notes ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+    "(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(text, ''))) STORED",
+    "CREATE INDEX ix_notes_search ON notes USING GIN (search_vector)",
+]
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Note.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Note.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
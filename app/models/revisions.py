@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, LargeBinary
+
+from app.database import Base
+
+
+class NoteRevision(Base):
+    """
+    Прошлая версия заметки. snapshot - полный текст, delta - обратная
+    разница: как из текста версии version + 1 получить текст этой версии
+    (app.services.revisions). data сжато zlib.
+    """
+    __tablename__ = "note_revisions"
+    __table_args__ = (
+        Index("ux_note_revisions_note_version", "note_id", "version", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    note_id = Column(Integer, ForeignKey('notes.id', ondelete="CASCADE"), nullable=False)
+    owner_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    version = Column(Integer, nullable=False)
+    kind = Column(String(8), nullable=False)
+    name = Column(String)
+    # Длина текста версии в символах
+    size = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    # Когда версия была сохранена (updated_at заметки на тот момент)
+    created_at = Column(DateTime)
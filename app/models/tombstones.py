@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+
+from datetime import datetime
+
+from app.database import Base
+
+
+class Tombstone(Base):
+    """След удалённой заметки или папки для дельта-синхронизации клиентов"""
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_owner_seq", "owner_id", "change_seq"),
+        Index("ix_tombstones_deleted_at", "deleted_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    entity = Column(String(16), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=lambda: datetime.utcnow())
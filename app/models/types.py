@@ -0,0 +1,46 @@
+from sqlalchemy import String, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import Pool
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import TypeDecorator
+
+from app.compression import compress_text, decompress_text, register_sqlite_functions
+
+
+class CompressedText(TypeDecorator):
+    """
+    Текст, который в SQLite хранится сжатым zlib выше порога
+    NOTE_COMPRESS_THRESHOLD. Postgres сжимает длинные значения сам (TOAST),
+    поэтому там тело пишется как есть.
+    """
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if dialect.name == "sqlite":
+            return compress_text(value)
+        return value
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+
+class note_preview(FunctionElement):
+    """Первые length символов тела заметки без распаковки целиком"""
+    type = String()
+    inherit_cache = True
+
+
+@compiles(note_preview)
+def _compile_note_preview(element, compiler, **kw):
+    text, length = list(element.clauses)
+    return f"substr({compiler.process(text, **kw)}, 1, {compiler.process(length, **kw)})"
+
+
+@compiles(note_preview, "sqlite")
+def _compile_note_preview_sqlite(element, compiler, **kw):
+    return f"note_preview({compiler.process(element.clauses, **kw)})"
+
+
+# Для любого движка: приложения, alembic, бенчмарков
+event.listen(Pool, "connect", register_sqlite_functions)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+
+from app.database import Base
+
+
+class EntityVersion(Base):
+    """Счётчик версий для ETag: ключ вида note:1, user:1:notes"""
+    __tablename__ = "entity_versions"
+
+    key = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
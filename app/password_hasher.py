@@ -0,0 +1,49 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+
+class PasswordHasher:
+    """
+    bcrypt в отдельном ограниченном пуле потоков: bcrypt отпускает GIL,
+    поэтому хеширование не держит event loop. Если пул и очередь заняты,
+    запрос сразу получает 503 вместо ожидания в хвосте.
+    """
+
+    def __init__(self, rounds: int, workers: int, queue_limit: int):
+        # min/max = rounds: хеш с любой другой стоимостью считается
+        # устаревшим и пересчитывается при следующем входе
+        self.context = CryptContext(
+            schemes=['bcrypt'],
+            deprecated='auto',
+            bcrypt__rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._limit = workers + queue_limit
+        self._pending = 0
+
+    async def _run(self, func, *args):
+        if self._pending >= self._limit:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервер перегружен, повторите попытку позже",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str):
+        """Возвращает (совпал ли пароль, новый хеш или None)"""
+        return await self._run(self.context.verify_and_update, password, hashed)
@@ -0,0 +1,274 @@
+"""
+Профилирование отдельных запросов без передеплоя.
+
+Запрос профилируется, если в нём есть заголовок X-Profile или параметр
+?profile= со значением PROFILE_TOKEN, либо случайно с вероятностью
+PROFILE_SAMPLE_RATE. Профиль - свёрнутые стеки (collapsed stacks,
+формат flamegraph.pl и speedscope) в PROFILE_DIR. Там хранятся только
+последние PROFILE_KEEP профилей, id профиля уходит в заголовке X-Profile-Id.
+
+Профилировщик выборочный, на стандартной библиотеке: поток раз в
+PROFILE_INTERVAL_MS снимает стек потока цикла событий. Выборка
+засчитывается запросу, только если в этот момент выполняется его задача
+или задача, созданная из неё (gather_in_sessions), - конкурентные запросы
+в профиль не попадают. Время, когда задача запроса ждёт (БД, сеть, другие
+запросы), копится в отдельном кадре "(ожидание)".
+"""
+import asyncio
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from secrets import token_hex
+from urllib.parse import parse_qs
+
+import orjson
+from loguru import logger
+
+from app.config import Config
+
+PROFILE_ID_PATTERN = r"^\d{13}-[0-9a-f]{8}$"
+IDLE_FRAME = "(ожидание)"
+
+_profile = ContextVar("profile", default=None)
+_active = set()
+_lock = threading.Lock()
+_sampler = None
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_ASYNCIO = os.path.dirname(asyncio.__file__)
+
+
+class Profile:
+    def __init__(self, scope, trigger: str):
+        self.id = f"{int(time.time() * 1000):013d}-{token_hex(4)}"
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.trigger = trigger
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        self.tasks = {asyncio.current_task()}
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+        self.deadline = self.started + Config.PROFILE_MAX_SECONDS
+
+    def sample(self, frames: dict, now: float):
+        if now > self.deadline:
+            return
+        self.samples += 1
+        if asyncio.current_task(self.loop) in self.tasks:
+            self.stacks[_collapse(frames.get(self.thread_id))] += 1
+        else:
+            self.stacks[IDLE_FRAME] += 1
+
+
+@lru_cache(maxsize=4096)
+def _label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    else:
+        # site-packages/sqlalchemy/orm/session.py -> sqlalchemy/orm/session.py
+        for path in sorted(sys.path, key=len, reverse=True):
+            if path and filename.startswith(path + os.sep):
+                filename = filename[len(path) + 1:]
+                break
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        stack.append(frame.f_code)
+        frame = frame.f_back
+    # Корень - сам цикл событий (run_forever, Task.__step), он одинаков
+    # у всех выборок и только сдвигает полезные кадры вправо
+    while stack and stack[-1].co_filename.startswith(_ASYNCIO):
+        stack.pop()
+    while stack and stack[-1].co_filename == threading.__file__:
+        stack.pop()
+    return ";".join(_label(code) for code in reversed(stack)) or IDLE_FRAME
+
+
+def _sample_loop():
+    global _sampler
+    interval = Config.PROFILE_INTERVAL_MS / 1000
+    while True:
+        time.sleep(interval)
+        with _lock:
+            if not _active:
+                _sampler = None
+                return
+            profiles = tuple(_active)
+        frames = sys._current_frames()
+        now = time.perf_counter()
+        for profile in profiles:
+            profile.sample(frames, now)
+        del frames
+
+
+def _start(profile: Profile):
+    global _sampler
+    _install_task_factory(profile.loop)
+    with _lock:
+        _active.add(profile)
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_loop, name="request-profiler", daemon=True)
+            _sampler.start()
+
+
+def _stop(profile: Profile):
+    with _lock:
+        _active.discard(profile)
+
+
+def _install_task_factory(loop):
+    # Задачи, созданные из профилируемого запроса, засчитываются ему же
+    previous = loop.get_task_factory()
+    if getattr(previous, "profiler", False):
+        return
+
+    def factory(loop, coro, **kwargs):
+        if previous is not None:
+            task = previous(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        profile = _profile.get()
+        if profile is not None:
+            profile.tasks.add(task)
+        return task
+
+    factory.profiler = True
+    loop.set_task_factory(factory)
+
+
+def check_token(value) -> bool:
+    """Совпадает ли value с PROFILE_TOKEN; без PROFILE_TOKEN - всегда нет"""
+    return bool(Config.PROFILE_TOKEN) and value is not None and hmac.compare_digest(
+        value.encode() if isinstance(value, str) else value, Config.PROFILE_TOKEN.encode()
+    )
+
+
+def _trigger(scope):
+    if Config.PROFILE_TOKEN:
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return "header" if check_token(value) else None
+        query = scope.get("query_string", b"")
+        if b"profile=" in query:
+            values = parse_qs(query.decode("latin-1")).get("profile")
+            return "query" if values and check_token(values[0]) else None
+
+    if Config.PROFILE_SAMPLE_RATE and random.random() < Config.PROFILE_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+def _profile_path(profile_id: str, extension: str) -> str:
+    return os.path.join(Config.PROFILE_DIR, f"{profile_id}.{extension}")
+
+
+def _save(profile: Profile, route: str, status_code: int, duration: float):
+    os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+    with open(_profile_path(profile.id, "collapsed"), "w") as file:
+        for stack, count in profile.stacks.most_common():
+            file.write(f"{profile.method} {route};{stack} {count}\n")
+
+    meta = {
+        "id": profile.id,
+        "method": profile.method,
+        "route": route,
+        "path": profile.path,
+        "status": status_code,
+        "trigger": profile.trigger,
+        "duration_ms": round(duration * 1000, 2),
+        "samples": profile.samples,
+        "interval_ms": Config.PROFILE_INTERVAL_MS,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    # Метаданные пишутся последними: профиль без них не виден в списке
+    with open(_profile_path(profile.id, "json"), "wb") as file:
+        file.write(orjson.dumps(meta))
+
+    for stale in list_profile_ids()[Config.PROFILE_KEEP:]:
+        for extension in ("json", "collapsed"):
+            try:
+                os.remove(_profile_path(stale, extension))
+            except FileNotFoundError:
+                pass
+
+
+def list_profile_ids():
+    """id сохранённых профилей, новые первыми"""
+    try:
+        names = os.listdir(Config.PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted((name[:-5] for name in names if name.endswith(".json")), reverse=True)
+
+
+def list_profiles():
+    profiles = []
+    for profile_id in list_profile_ids():
+        try:
+            with open(_profile_path(profile_id, "json"), "rb") as file:
+                profiles.append(orjson.loads(file.read()))
+        except FileNotFoundError:
+            # Вытеснен параллельной записью
+            continue
+    return profiles
+
+
+def profile_file(profile_id: str):
+    """Путь к свёрнутым стекам профиля или None"""
+    path = _profile_path(profile_id, "collapsed")
+    return path if os.path.exists(_profile_path(profile_id, "json")) else None
+
+
+class ProfilerMiddleware:
+    """
+    Профилирует запрос, если он помечен (_trigger). Ставится внутренним
+    слоем, в той же задаче, что и обработчик маршрута: внешние
+    BaseHTTPMiddleware запускают вложенное приложение в отдельной задаче.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        trigger = _trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            return await self.app(scope, receive, send)
+
+        profile = Profile(scope, trigger)
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile.id.encode()),
+                ]}
+            await send(message)
+
+        token = _profile.set(profile)
+        _start(profile)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _stop(profile)
+            _profile.reset(token)
+            duration = time.perf_counter() - profile.started
+            route = scope.get("route")
+            route = route.path if route is not None else scope["path"]
+            try:
+                await asyncio.to_thread(_save, profile, route, status_code, duration)
+            except OSError as e:
+                logger.warning("Не удалось сохранить профиль {}: {}", profile.id, e)
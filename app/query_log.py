@@ -0,0 +1,116 @@
+"""
+SQL-запросы в разрезе HTTP-запроса: сколько их, сколько времени они
+заняли и какие повторялись (вероятный N+1). Плюс журнал медленных
+запросов с параметрами.
+
+Счётчик живёт в ContextVar, который QueryLogMiddleware выставляет на
+время запроса. Его видят и дочерние задачи (gather_in_sessions,
+auto_refresh_token), и хуки движка: greenlet асинхронной сессии
+разделяет контекст с вызвавшей его задачей.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from loguru import logger
+
+from app.config import Config
+
+_current = ContextVar("request_queries", default=None)
+_batched = ContextVar("query_log_batched", default=False)
+
+
+class RequestQueries:
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def repeated(self):
+        """Одинаковые (с точностью до параметров) запросы, выполненные N_PLUS_ONE_THRESHOLD и более раз"""
+        return [
+            (statement, count) for statement, count in self.statements.items()
+            if count >= Config.N_PLUS_ONE_THRESHOLD
+        ]
+
+
+def current() -> RequestQueries:
+    return _current.get()
+
+
+@contextmanager
+def batched():
+    """
+    Запросы внутри повторяются намеренно (пачки массовых операций и
+    импорта): они считаются, но в проверку на N+1 не попадают.
+    """
+    token = _batched.set(True)
+    try:
+        yield
+    finally:
+        _batched.reset(token)
+
+
+def _short(value, limit: int = 500) -> str:
+    text = " ".join(str(value).split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def record(statement: str, parameters, elapsed: float, executemany: bool = False):
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        # executemany - одна пачка строк, а не запрос на каждую
+        if not executemany and not _batched.get():
+            stats.statements[statement] += 1
+
+    if elapsed * 1000 >= Config.SLOW_QUERY_MS:
+        logger.warning(
+            "Медленный запрос {:.1f} мс: {} | параметры: {}",
+            elapsed * 1000, _short(statement), _short(parameters),
+        )
+
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    return f'{scope["method"]} {route.path if route is not None else scope["path"]}'
+
+
+class QueryLogMiddleware:
+    """
+    Считает SQL-запросы каждого HTTP-запроса. При QUERY_DEBUG_HEADERS
+    отдаёт их в заголовках X-DB-Queries, X-DB-Time-Ms и X-DB-Repeated (число
+    запросов, повторённых N_PLUS_ONE_THRESHOLD и более раз). Заголовки
+    уходят с началом ответа: запросы во время потоковой отдачи в них не
+    попадают, но попадают в проверку на N+1 в конце.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestQueries()
+        token = _current.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and Config.QUERY_DEBUG_HEADERS:
+                message = {**message, "headers": list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.seconds * 1000:.2f}".encode()),
+                    (b"x-db-repeated", str(len(stats.repeated())).encode()),
+                ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            for statement, count in stats.repeated():
+                logger.warning("Возможный N+1 в {}: {} одинаковых запросов: {}",
+                               _route(scope), count, _short(statement))
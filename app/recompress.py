@@ -0,0 +1,78 @@
+"""
+Пережимает тела существующих заметок под текущие NOTE_COMPRESS_THRESHOLD
+и NOTE_COMPRESS_LEVEL: сжимает крупные, распаковывает те, что стали ниже
+порога. Идёт пачками по id, каждая пачка - своя транзакция, так что
+прерванный запуск можно просто повторить.
+
+    python -m app.recompress --batch-size 500
+    python -m app.recompress --dry-run
+"""
+import argparse
+import asyncio
+import json
+
+from sqlalchemy import String, bindparam, select, type_coerce, update
+
+from app.compression import compress_text, decompress_text
+from app.config import Config
+from app.database import AsyncSessionLocal, async_engine
+from app.models import Note
+
+
+async def recompress_notes(batch_size: int = Config.IMPORT_BATCH_SIZE, dry_run: bool = False):
+    # Читаем хранимое значение как есть, мимо CompressedText
+    stored = type_coerce(Note.text, String)
+    rewrite = (
+        update(Note.__table__)
+        .where(Note.__table__.c.id == bindparam("note_id"))
+        .values(text=bindparam("body"))
+    )
+    stats = {"scanned": 0, "rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+    last_id = 0
+    if async_engine.dialect.name != "sqlite":
+        # Postgres сжимает длинные значения сам (TOAST), CompressedText там не сжимает
+        return stats
+
+    while True:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(Note.id, stored).where(Note.id > last_id).order_by(Note.id).limit(batch_size)
+            )).all()
+            if not rows:
+                break
+
+            changed = []
+            for note_id, value in rows:
+                text = decompress_text(value)
+                target = compress_text(text)
+                size_before = len(value.encode("utf-8") if isinstance(value, str) else value or b"")
+                size_after = len(target.encode("utf-8") if isinstance(target, str) else target or b"")
+                stats["bytes_before"] += size_before
+                stats["bytes_after"] += size_after
+                if target != value:
+                    # В executemany уходит текст: сжатие сделает CompressedText
+                    changed.append({"note_id": note_id, "body": text})
+
+            stats["scanned"] += len(rows)
+            stats["rewritten"] += len(changed)
+            last_id = rows[-1][0]
+
+            if changed and not dry_run:
+                await db.execute(rewrite, changed)
+                await db.commit()
+
+    return stats
+
+
+async def main(args):
+    try:
+        print(json.dumps(await recompress_notes(args.batch_size, args.dry_run), indent=2))
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=Config.IMPORT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true")
+    asyncio.run(main(parser.parse_args()))
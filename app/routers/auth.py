@@ -7,25 +7,37 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.templating import Jinja2Templates
 
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, insert
 
-from passlib.context import CryptContext
-
 import jwt
 from jose import jwt, JWTError
 
+from app import metrics
 from app.database import get_db
 from app.config import Config
 from app.models import User
+from app.password_hasher import PasswordHasher
+from app.token_cache import TokenCache
 
 
 templates = Jinja2Templates(directory='app/templates/')
 
 SECRET_KEY = Config.SECRET_KEY
 ALGORITHM = Config.ALGORITHM
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+password_hasher = PasswordHasher(Config.BCRYPT_ROUNDS, Config.HASH_WORKERS, Config.HASH_QUEUE_LIMIT)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
+token_cache = TokenCache(Config.TOKEN_CACHE_SIZE)
+
+
+def decode_token(token: str) -> dict:
+    # Подпись проверяется один раз на токен, дальше payload берётся из кэша
+    payload = token_cache.get(token)
+    metrics.token_cache_lookups.inc("miss" if payload is None else "hit")
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.put(token, payload)
+    return payload
 
 
 def get_token_from_cookie(
@@ -65,7 +77,7 @@ def create_refresh_token(username: str, user_id: int, expires_delta: timedelta):
 
 def get_user_by_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         user_id = payload.get("id")
         username = payload.get("sub")
 
@@ -77,21 +89,30 @@ def get_user_by_token(token: str):
         
         user = {"user_id": user_id, "username": username}
         return user
-    except jwt.PyJWTError:
+    except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Недействительный токен"
         )
 
 
-def authenticate_user(db: Annotated[Session, Depends(get_db)], username: str, password: str):
-    user = db.scalar(select(User).where(User.login == username))
-    if not user or not bcrypt_context.verify(password, user.hash_password):
+async def authenticate_user(db: Annotated[AsyncSession, Depends(get_db)], username: str, password: str):
+    user = await db.scalar(select(User).where(User.login == username))
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await password_hasher.verify_and_update(password, user.hash_password)
+
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Стоимость bcrypt в Config поменялась - пересохраняем хеш
+    if new_hash:
+        user.hash_password = new_hash
+        await db.commit()
     return user
 
 
@@ -99,11 +120,7 @@ async def set_token(request: Request,
                     token: str,
                     secret_key: str,
                     call_next):
-    payload = jwt.decode(
-        token,
-        secret_key,
-        algorithms=[Config.ALGORITHM]
-    )
+    payload = decode_token(token)
 
     new_access_token = create_access_token(
         username=payload["sub"],
@@ -136,7 +153,7 @@ async def auto_refresh_token(request: Request, call_next):
         return await call_next(request)
 
     try:
-        payload = jwt.decode(access_token, Config.SECRET_KEY, algorithms=[Config.ALGORITHM])
+        payload = decode_token(access_token)
         exp = payload.get("exp")
         if exp is None:
             raise JWTError("No exp in access token")
@@ -157,11 +174,7 @@ async def auto_refresh_token(request: Request, call_next):
 
     except jwt.ExpiredSignatureError:
         try:
-            refresh_payload = jwt.decode(
-                refresh_token,
-                Config.SECRET_KEY,
-                algorithms=[Config.ALGORITHM]
-            )
+            refresh_payload = decode_token(refresh_token)
             if refresh_payload.get("type") != "refresh":
                 raise JWTError("Invalid refresh token type")
 
@@ -211,10 +224,10 @@ router = APIRouter()
 @router.post("/token")
 async def login(
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     create_and_save_tokens(user, response)
 
 
@@ -224,7 +237,7 @@ async def login(
 @router.post("/register")
 async def register(
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     login: str = Form(...),
     password: str = Form(...),
     confirm_password: str = Form(...)
@@ -236,17 +249,17 @@ async def register(
         )
 
     try:
-        existing_user = db.scalar(select(User).where(User.login == login))
+        existing_user = await db.scalar(select(User).where(User.login == login))
         if existing_user:
             return JSONResponse(
                 content={"detail": "Пользователь с таким логином уже существует"},
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
-        user = User(login=login, hash_password=bcrypt_context.hash(password))
+        user = User(login=login, hash_password=await password_hasher.hash(password))
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
 
         create_and_save_tokens(user, response), 
         return {"message": "OK"} 
@@ -254,8 +267,10 @@ async def register(
         #TODO:
         #Переадрисовавывать на главную страницу
 
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return JSONResponse(
             content={"detail": "Ошибка регистрации"},
             status_code=status.HTTP_400_BAD_REQUEST
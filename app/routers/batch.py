@@ -0,0 +1,45 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import services
+from app.database import get_db
+from app.routers import auth
+from app.schemas import BatchRequest
+
+router = APIRouter()
+
+
+@router.post('/')
+async def run_batch(
+    payload: BatchRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    token: str = Depends(auth.get_token_from_cookie)
+):
+    """
+    Пакет операций над заметками и папками за один запрос и один коммит.
+    В режиме all_or_nothing при ошибке отвечает 409 с отчётом по операциям.
+    """
+    try:
+        user = auth.get_user_by_token(token=token)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Пользователь не найден"
+            )
+
+        report = await services.run_batch(db, user["user_id"], payload.operations, payload.mode)
+        if not report["committed"]:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=report)
+
+        return report
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
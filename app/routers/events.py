@@ -0,0 +1,68 @@
+import asyncio
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from app import services
+from app.config import Config
+from app.events import broker
+from app.routers import auth
+
+router = APIRouter()
+
+
+class EventStreamResponse(StreamingResponse):
+    # Starlette не закрывает генератор, если ответ прерван отключением
+    # клиента, - закрываем сами, чтобы подписка снималась сразу
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
+
+
+def _format(message: dict) -> str:
+    lines = []
+    if message.get("change_seq"):
+        lines.append(f"id: {message['change_seq']}")
+    lines.append("event: change")
+    lines.append("data: " + orjson.dumps(message).decode())
+    return "\n".join(lines) + "\n\n"
+
+
+@router.get('/')
+async def stream_events(
+    request: Request,
+    token: str = Depends(auth.get_token_from_cookie)
+):
+    """
+    Поток Server-Sent Events с изменениями заметок и папок пользователя.
+    Событие change: {"entity", "op": "changed" | "deleted", "ids", "change_seq"}.
+    ids = null или op = "resync" - изменений слишком много, страницу
+    проще перечитать целиком (или догнаться через /sync/changes).
+    """
+    user = auth.get_user_by_token(token=token)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден"
+        )
+
+    async def stream():
+        async with broker.subscribe(services.user_channel(user["user_id"])) as subscription:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(subscription.get(), Config.EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    # Комментарий держит соединение через прокси и замечает отключение
+                    yield ": keepalive\n\n"
+                    continue
+                yield _format(message)
+
+    return EventStreamResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
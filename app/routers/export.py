@@ -0,0 +1,35 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app import services
+from app.routers import auth
+
+router = APIRouter()
+
+EXPORT_FORMATS = {
+    "zip": (services.export_zip, "application/zip"),
+    "ndjson": (services.export_ndjson, "application/x-ndjson"),
+}
+
+
+@router.get('/')
+async def export_user_data(
+    format: Literal["zip", "ndjson"] = "zip",
+    token: str = Depends(auth.get_token_from_cookie)
+):
+    user = auth.get_user_by_token(token=token)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден"
+        )
+
+    export, media_type = EXPORT_FORMATS[format]
+    filename = f"notes_export_{user['user_id']}.{format}"
+    return StreamingResponse(
+        export(user["user_id"]),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,16 +1,12 @@
-from random import randint
-
 from fastapi import APIRouter
 from typing import Annotated, Optional, List
 
-from fastapi import APIRouter, Depends, status, HTTPException, Request, Query, Cookie
+from fastapi import APIRouter, Depends, status, HTTPException, Request, Response, Query, Cookie
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
-import httpx
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy import select, func
 from starlette.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
@@ -21,18 +17,20 @@ from loguru import logger
 
 from app.models import *
 from app.routers import auth
-from app.database import get_db
+from app.database import get_db, get_read_db, gather_in_sessions
 from app.schemas import *
+from app import services
 from app.config import Config
+from app.slugs import folder_slug
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 templates = Jinja2Templates(directory='app/templates/')
 
 router = APIRouter()
 
-@router.post('/')
+@router.post('/', response_model=FolderOut)
 async def create_folder(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
     folder_data: FolderCreate,  
     token: str = Depends(auth.get_token_from_cookie)
 ):
@@ -46,7 +44,7 @@ async def create_folder(
 
         folder = Folder(
             owner_id=user["user_id"],
-            slug = f"folder_{randint(0, 10000)}",
+            slug=folder_slug(),
             color=folder_data.color,
             name=folder_data.name,
             is_public=folder_data.is_public,
@@ -54,30 +52,69 @@ async def create_folder(
             hash_password=folder_data.password,
         )
         db.add(folder)
-        db.commit()
-        db.refresh(folder)
+        await db.flush()
+        await services.bump_versions(db, [services.folder_key(folder.id), services.user_folders_key(folder.owner_id)])
+        await db.commit()
+        await db.refresh(folder)
 
         return folder
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
 
-@router.get('/{folder_id}/')
+@router.get('/slug/{slug}/', response_model=FolderOut)
+async def get_folder_by_slug(
+    slug: str,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+):
+    try:
+        folder = await services.get_folder_by_slug(db, slug)
+        if not folder:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Объект не найден"
+            )
+
+        return folder
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+        )
+
+
+@router.get('/{folder_id}/', response_model=FolderOut)
 async def get_folder_by_id(
     folder_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    request: Request,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
 ):
     try:
-        query = select(Folder).where(Folder.id == folder_id)
-        result = db.execute(query)
+        etag, matched = await services.resource_etag(db, request, services.folder_key(folder_id))
+        if matched:
+            return services.not_modified(etag)
+
+        folder = await services.get_folder(db, folder_id)
+        if not folder:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Объект не найден"
+            )
 
-        return result.scalars().one()
+        services.set_etag(response, etag)
+        return folder
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -85,16 +122,21 @@ async def get_folder_by_id(
         )
 
 
-@router.get('/by_user/{user_id}/')
+@router.get('/by_user/{user_id}/', response_model=FolderPage)
 async def get_folders_by_user_id(
     user_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    cursor: Optional[str] = None,
+    limit: int = Query(Config.PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
 ):
     try:
-        query = select(Folder).where(Folder.owner_id == user_id)
-        result = db.execute(query)
+        etag, matched = await services.resource_etag(db, request, services.user_folders_key(user_id))
+        if matched:
+            return services.not_modified(etag)
 
-        return result.scalars().all()
+        page = await services.get_folders_by_user(db, user_id, cursor, limit)
+        return services.set_etag(ORJSONResponse(page), etag)
 
     except Exception as e:
         raise HTTPException(
@@ -105,18 +147,30 @@ async def get_folders_by_user_id(
 @router.delete('/{folder_id}/')
 async def del_folder_by_id(
     folder_id: int,
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_db)]
 ):
 
     try:
-        obj_del = db.scalar(select(Folder).where(Folder.id == folder_id))
+        obj_del = await db.scalar(select(Folder).where(Folder.id == folder_id))
         if not obj_del:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Объект не найден"
             )
 
-        db.delete(obj_del)
-        db.commit()
+        # Заметки папки остаются без папки - их версии тоже меняются.
+        # Загружать сами заметки не нужно: ORM обнулял бы folder_id каждой
+        # отдельным UPDATE, а хук в services.sync делает это одним
+        released = (await db.execute(
+            select(Note.id, Note.owner_id).where(Note.folder_id == folder_id)
+        )).all()
+        await services.bump_versions(
+            db,
+            [services.folder_key(folder_id), services.user_folders_key(obj_del.owner_id)]
+            + [services.note_key(note_id) for note_id, _ in released]
+            + [services.user_notes_key(owner_id) for _, owner_id in released]
+        )
+        await db.delete(obj_del)
+        await db.commit()
 
         return "OK"
 
@@ -127,14 +181,14 @@ async def del_folder_by_id(
         )
 
 
-@router.put('/{folder_id}/')
+@router.put('/{folder_id}/', response_model=FolderUpdateOut)
 async def update_folder(
         folder_id: int,
         folder_data: FolderCreate,
-        db: Annotated[Session, Depends(get_db)]
+        db: Annotated[AsyncSession, Depends(get_db)]
 ):
     try:
-        db_folder = db.scalar(select(Folder).where(Folder.id == folder_id))
+        db_folder = await db.scalar(select(Folder).where(Folder.id == folder_id))
         if not db_folder:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -145,13 +199,14 @@ async def update_folder(
             setattr(db_folder, field, value)
 
         db.add(db_folder)
-        db.commit()
-        db.refresh(db_folder)
+        await services.bump_versions(db, [services.folder_key(folder_id), services.user_folders_key(db_folder.owner_id)])
+        await db.commit()
+        await db.refresh(db_folder)
 
         return {"message": "UPDATE OK", "folder": db_folder}
 
     except Exception as e:
-        db.rollback()  # Откатываем изменения в случае ошибки
+        await db.rollback()  # Откатываем изменения в случае ошибки
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -161,7 +216,6 @@ async def update_folder(
 async def folder_page(
         folder_id: int,
         request: Request,
-        db: Annotated[Session, Depends(get_db)],
         token: Optional[str] = None
 
 ):
@@ -176,16 +230,17 @@ async def folder_page(
         if not user:
             return RedirectResponse(url="/auth/create", status_code=status.HTTP_303_SEE_OTHER)
         
-        folder = None
-        notes = []
-        async with httpx.AsyncClient() as client:
-            response_folder = await client.get(f"{Config.URL}/folder/{folder_id}/")
-            folder = response_folder.json()
-
-        query = select(Note).where(Note.owner_id == user["user_id"]).where(Note.folder_id == folder_id)
-        result = db.execute(query)
-
-        notes = result.scalars().all()
+        folder, notes_page, folders_page = await gather_in_sessions(
+            (services.get_folder, folder_id),
+            (services.get_notes_by_folder, user["user_id"], folder_id, None, None, "summary"),
+            (services.get_folders_by_user, user["user_id"]),
+            user_id=user["user_id"],
+        )
+        if not folder:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Объект не найден"
+            )
 
         return templates.TemplateResponse(
             "folder.html",
@@ -195,7 +250,8 @@ async def folder_page(
                 "username": user["username"],
                 "user_id": user["user_id"],
                 "folder": folder,
-                "notes": notes
+                "notes": notes_page["items"],
+                "all_folders": folders_page["items"]
             }
 
         )
@@ -203,10 +259,8 @@ async def folder_page(
     except HTTPException as e:
         if e.status_code == status.HTTP_401_UNAUTHORIZED:
             return RedirectResponse(url="/auth/create", status_code=status.HTTP_303_SEE_OTHER)
-        db.rollback()
         raise
     except Exception as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Произошла ошибка на сервере"
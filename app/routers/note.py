@@ -1,15 +1,13 @@
-from random import randint
-
 from fastapi import APIRouter
-from typing import Annotated, Optional, List
+from typing import Annotated, Optional, List, Literal, Union
 
-from fastapi import APIRouter, Depends, status, HTTPException, Request, Query, Cookie, Body
+from fastapi import APIRouter, Depends, status, HTTPException, Request, Response, Query, Cookie, Body
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy import select, func, delete
 
 import jwt
@@ -17,41 +15,47 @@ from loguru import logger
 
 from app.models import *
 from app.routers import auth
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas import *
+from app import services
+from app.config import Config
+from app.slugs import note_slug
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
 router = APIRouter()
 
-@router.post('/')
+@router.post('/', response_model=NoteOut)
 async def create_note(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_db)],
     note_data: NoteBase,
     token: str = Depends(auth.get_token_from_cookie)
 ):
     try:
-        if not auth.get_user_by_token(token=token):
+        user = auth.get_user_by_token(token=token)
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Пользователь не найден"   
             )
 
         note = Note(
-            owner_id=auth.get_user_by_token(token=token)["user_id"],
+            owner_id=user["user_id"],
             folder_id=note_data.folder_id,
-            slug=f"note_{randint(1, 1000)}",
+            slug=note_slug(),
             text=note_data.text,
             name=note_data.name,
         )
         db.add(note)
-        db.commit()
-        db.refresh(note)
+        await db.flush()
+        await services.bump_versions(db, [services.note_key(note.id), services.user_notes_key(note.owner_id)])
+        await db.commit()
+        await db.refresh(note)
 
         return note
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -59,15 +63,109 @@ async def create_note(
 
 
 
-@router.get('/all/')
+@router.post('/import')
+async def import_notes(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    batch_size: int = Query(Config.IMPORT_BATCH_SIZE, ge=1, le=10000),
+    token: str = Depends(auth.get_token_from_cookie)
+):
+    """
+    Импорт заметок из NDJSON: по объекту NoteBase на строку. Тело можно
+    отправить потоком (application/x-ndjson) или файлом в поле file
+    multipart-формы.
+    """
+    try:
+        user = auth.get_user_by_token(token=token)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Пользователь не найден"
+            )
+
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Файл не передан"
+                )
+
+            async def chunks():
+                while chunk := await upload.read(64 * 1024):
+                    yield chunk
+        else:
+            chunks = request.stream
+
+        lines = services.iter_lines(chunks(), Config.IMPORT_MAX_LINE_BYTES)
+        return await services.import_notes(db, user["user_id"], lines, batch_size)
+
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get('/all/', response_model=Union[NotePage, NoteSummaryPage])
 async def get_all_notes(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    cursor: Optional[str] = None,
+    limit: int = Query(Config.PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    view: Literal["full", "summary"] = "full",
+):
+    try:
+        return ORJSONResponse(await services.get_all_notes(db, cursor, limit, view))
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+        )
+
+
+@router.get('/summary/', response_model=List[NoteSummaryOut])
+async def get_note_summaries(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    ids: List[int] = Query(..., min_length=1, max_length=Config.MAX_PAGE_SIZE),
+    token: str = Depends(auth.get_token_from_cookie)
+):
+    """Карточки нескольких заметок пользователя одним запросом, без текста"""
+    try:
+        user = auth.get_user_by_token(token=token)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Пользователь не найден"
+            )
+
+        return ORJSONResponse(await services.get_note_summaries(db, user["user_id"], ids))
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+        )
+
+
+@router.get('/search', response_model=List[NoteSearchOut])
+async def search_notes(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    q: str = Query(..., min_length=1),
+    limit: int = Query(Config.PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    token: str = Depends(auth.get_token_from_cookie)
 ):
     try:
-        query = select(Note)
-        result = db.execute(query)
+        user = auth.get_user_by_token(token=token)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Пользователь не найден"
+            )
 
-        return result.scalars().all()
+        return await services.search_notes(db, user["user_id"], q, limit)
 
     except Exception as e:
         raise HTTPException(
@@ -76,17 +174,54 @@ async def get_all_notes(
         )
 
 
-@router.get('/{note_id}/')
+@router.get('/slug/{slug}/', response_model=NoteOut)
+async def get_note_by_slug(
+    slug: str,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+):
+    try:
+        note = await services.get_note_by_slug(db, slug)
+        if not note:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Объект не найден"
+            )
+
+        return note
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+        )
+
+
+@router.get('/{note_id}/', response_model=NoteOut)
 async def get_note_by_id(
     note_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    request: Request,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
 ):
     try:
-        query = select(Note).where(Note.id == note_id)
-        result = db.execute(query)
+        etag, matched = await services.resource_etag(db, request, services.note_key(note_id))
+        if matched:
+            return services.not_modified(etag)
+
+        note = await services.get_note(db, note_id)
+        if not note:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Объект не найден"
+            )
 
-        return result.scalars().one()
+        services.set_etag(response, etag)
+        return note
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -94,16 +229,89 @@ async def get_note_by_id(
         )
 
 
-@router.get('/by_user/{user_id}/')
+@router.get('/{note_id}/revisions/', response_model=NoteRevisionPage)
+async def get_note_revisions(
+    note_id: int,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    cursor: Optional[str] = None,
+    limit: int = Query(Config.PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    token: str = Depends(auth.get_token_from_cookie)
+):
+    try:
+        user = auth.get_user_by_token(token=token)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Пользователь не найден"
+            )
+
+        page = await services.get_revisions(db, user["user_id"], note_id, cursor, limit)
+        if page is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Объект не найден"
+            )
+
+        return ORJSONResponse(page)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get('/{note_id}/revisions/{version}/', response_model=NoteRevisionText)
+async def get_note_revision(
+    note_id: int,
+    version: int,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    token: str = Depends(auth.get_token_from_cookie)
+):
+    try:
+        user = auth.get_user_by_token(token=token)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Пользователь не найден"
+            )
+
+        revision = await services.get_revision(db, user["user_id"], note_id, version)
+        if revision is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Версия не найдена"
+            )
+
+        return ORJSONResponse(revision)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get('/by_user/{user_id}/', response_model=Union[NotePage, NoteSummaryPage])
 async def get_note_by_user_id(
     user_id: int,
-    db: Annotated[Session, Depends(get_db)],
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    cursor: Optional[str] = None,
+    limit: int = Query(Config.PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    view: Literal["full", "summary"] = "full",
 ):
     try:
-        query = select(Note).where(Note.owner_id == user_id)
-        result = db.execute(query)
+        etag, matched = await services.resource_etag(db, request, services.user_notes_key(user_id))
+        if matched:
+            return services.not_modified(etag)
 
-        return result.scalars().all()
+        page = await services.get_notes_by_user(db, user_id, cursor, limit, view)
+        return services.set_etag(ORJSONResponse(page), etag)
 
     except Exception as e:
         raise HTTPException(
@@ -114,21 +322,57 @@ async def get_note_by_user_id(
 @router.delete('/mass_deleting/')
 async def del_notes_by_id(
     notes_id: List[int],
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_db)],
+    token: str = Depends(auth.get_token_from_cookie)
 ):
 
     try:
+        user = auth.get_user_by_token(token=token)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Пользователь не найден"
+            )
+
         if not notes_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Нет объектов для удаления"
             )
 
-        db.execute(delete(Note).where(Note.id.in_(notes_id)))
-        db.commit()
+        deleted = await services.delete_notes(db, user["user_id"], notes_id)
+        await db.commit()
 
-        return "OK"
+        return {"message": "OK", "deleted": len(deleted), "note_ids": deleted}
+
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.patch("/mass_move/")
+async def move_notes(
+    payload: MoveNotesRequest=Body(...),
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(auth.get_token_from_cookie)
+):
+    try:
+        user = auth.get_user_by_token(token=token)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Пользователь не найден"
+            )
+
+        moved = await services.move_notes(db, user["user_id"], payload.note_ids, payload.folder_id)
+        await db.commit()
+
+        return {"message": "UPDATE OK", "moved": len(moved), "note_ids": moved}
 
     except Exception as e:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -138,18 +382,19 @@ async def del_notes_by_id(
 @router.delete('/{note_id}/')
 async def del_note_by_id(
     note_id: int,
-    db: Annotated[Session, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_db)]
 ):
 
     try:
-        obj_del = db.scalar(select(Note).where(Note.id == note_id))
+        obj_del = await db.scalar(select(Note).where(Note.id == note_id))
         if not obj_del:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Объект не найден"
             )
 
-        db.delete(obj_del)
-        db.commit()
+        await db.delete(obj_del)
+        await services.bump_versions(db, [services.note_key(note_id), services.user_notes_key(obj_del.owner_id)])
+        await db.commit()
 
         return "OK"
 
@@ -160,14 +405,14 @@ async def del_note_by_id(
         )
 
 
-@router.put('/{note_id}/')
+@router.put('/{note_id}/', response_model=NoteUpdateOut)
 async def update_note(
         note_id: int,
         note_data: NoteBase,
-        db: Annotated[Session, Depends(get_db)]
+        db: Annotated[AsyncSession, Depends(get_db)]
 ):
     try:
-        db_note = db.scalar(select(Note).where(Note.id == note_id))
+        db_note = await db.scalar(select(Note).where(Note.id == note_id))
         if not db_note:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -178,97 +423,139 @@ async def update_note(
             setattr(db_note, field, value)
 
         db.add(db_note)
-        db.commit()
-        db.refresh(db_note)
+        await services.bump_versions(db, [services.note_key(note_id), services.user_notes_key(db_note.owner_id)])
+        await db.commit()
+        await db.refresh(db_note)
 
         return {"message": "UPDATE OK", "note": db_note}
 
+    except StaleDataError:
+        # Заметку изменили между чтением и записью (version_id_col)
+        await db.rollback()
+        conflict = services.VersionConflict(await db.scalar(select(Note.version).where(Note.id == note_id)))
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(conflict), "version": conflict.version}
+        )
     except Exception as e:
-        db.rollback()  # Откатываем изменения в случае ошибки
+        await db.rollback()  # Откатываем изменения в случае ошибки
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
-@router.get('/by_folder/{folder_id}/')
-async def get_notes_by_folder_id(
-    folder_id: int,
-    db: Annotated[Session, Depends(get_db)],
-    token: str = Depends(oauth2_scheme),
+@router.patch('/{note_id}/text/')
+async def patch_note_text(
+        note_id: int,
+        patch: NotePatch,
+        db: Annotated[AsyncSession, Depends(get_db)],
+        token: str = Depends(auth.get_token_from_cookie)
 ):
+    """
+    Инкрементальное сохранение: вставки и удаления в тексте заметки
+    относительно версии base_version, без пересылки всего тела.
+    409 - заметку уже изменили, нужно перечитать её и повторить правки.
+    """
     try:
         user = auth.get_user_by_token(token=token)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Пользователь не найден"   
+                detail="Пользователь не найден"
+            )
+
+        note = await services.patch_note(db, user["user_id"], note_id, patch.base_version, patch.operations)
+        if not note:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Объект не найден"
             )
-        
-        query = select(Note).where(Note.owner_id == user["user_id"]).where(Note.folder_id == folder_id)
-        result = db.execute(query)
 
-        return result.scalars().all()
+        version, length = note.version, len(note.text)
+        await db.commit()
 
+        return {"message": "UPDATE OK", "id": note_id, "version": version, "length": length}
+
+    except services.VersionConflict as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "version": e.version}
+        )
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-                detail=str(e)
+            detail=str(e)
         )
 
-@router.patch('/{note_id}/')
-async def move_one_note(
-        note_id: int,
-        folder_id: int,
-        db: Annotated[Session, Depends(get_db)]
+
+@router.get('/by_folder/{folder_id}/', response_model=Union[NotePage, NoteSummaryPage])
+async def get_notes_by_folder_id(
+    folder_id: int,
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    token: str = Depends(oauth2_scheme),
+    cursor: Optional[str] = None,
+    limit: int = Query(Config.PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    view: Literal["full", "summary"] = "full",
 ):
     try:
-        db_note = db.scalar(select(Note).where(Note.id == note_id))
-        if not db_note:
+        user = auth.get_user_by_token(token=token)
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Объект не найден"
+                detail="Пользователь не найден"   
             )
 
-        db_note.folder_id = folder_id
-
+        etag, matched = await services.resource_etag(db, request, services.user_notes_key(user["user_id"]))
+        if matched:
+            return services.not_modified(etag)
 
-        db.commit()
-        db.refresh(db_note)
-
-        return {"message": "UPDATE OK", "note": db_note}
+        page = await services.get_notes_by_folder(db, user["user_id"], folder_id, cursor, limit, view)
+        return services.set_etag(ORJSONResponse(page), etag)
 
     except Exception as e:
-        db.rollback()  # Откатываем изменения в случае ошибки
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
+                detail=str(e)
         )
 
-
-@router.patch("/mass_move/")
-async def move_notes(
-    payload: MoveNotesRequest=Body(...),
-    db: Session = Depends(get_db)
+@router.patch('/{note_id}/', response_model=NoteUpdateOut)
+async def move_one_note(
+        note_id: int,
+        folder_id: int,
+        db: Annotated[AsyncSession, Depends(get_db)],
+        token: str = Depends(auth.get_token_from_cookie)
 ):
     try:
-        notes = db.scalars(select(Note).where(Note.id.in_(payload.note_ids))).all()
-
-        if len(notes) != len(payload.note_ids):
+        user = auth.get_user_by_token(token=token)
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Одна или несколько заметок не найдены"
+                detail="Пользователь не найден"
             )
 
-        for note in notes:
-            note.folder_id = payload.folder_id
+        moved = await services.move_notes(db, user["user_id"], [note_id], folder_id)
+        if not moved:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Объект не найден"
+            )
 
-        db.commit()
+        await db.commit()
 
-        return {"message": "UPDATE OK"}
+        return {"message": "UPDATE OK", "note": await services.get_note(db, note_id)}
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()  # Откатываем изменения в случае ошибки
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,36 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, status
+from fastapi.responses import FileResponse
+
+from app import profiler
+
+router = APIRouter()
+
+
+def require_profile_token(x_profile_token: Annotated[Optional[str], Header()] = None):
+    if not profiler.check_token(x_profile_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Нет доступа"
+        )
+
+
+@router.get('/', dependencies=[Depends(require_profile_token)])
+async def get_profiles():
+    """Сохранённые профили запросов, новые первыми (заголовок X-Profile-Token)"""
+    return profiler.list_profiles()
+
+
+@router.get('/{profile_id}/', dependencies=[Depends(require_profile_token)])
+async def download_profile(
+    profile_id: Annotated[str, Path(pattern=profiler.PROFILE_ID_PATTERN)]
+):
+    """Свёрнутые стеки профиля: flamegraph.pl profile.collapsed > profile.svg или speedscope"""
+    path = profiler.profile_file(profile_id)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Объект не найден"
+        )
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.collapsed")
@@ -0,0 +1,48 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import services
+from app.config import Config
+from app.database import get_db
+from app.routers import auth
+
+router = APIRouter()
+
+
+@router.get('/changes')
+async def get_changes(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    since: int = Query(0, ge=0),
+    limit: int = Query(Config.PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    token: str = Depends(auth.get_token_from_cookie)
+):
+    """
+    Заметки, папки и следы удалений, изменённые после since, не больше
+    limit. Пока has_more, следующий запрос - с cursor=next_cursor; в конце
+    next_since - since для следующей синхронизации. since=0 - полная выгрузка.
+    410 - клиент отстал дальше сжатых следов и должен начать с since=0.
+    """
+    try:
+        user = auth.get_user_by_token(token=token)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Пользователь не найден"
+            )
+
+        return ORJSONResponse(await services.get_changes(db, user["user_id"], since, limit, cursor))
+
+    except services.ResyncRequired as e:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
@@ -1,5 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List, Literal
+
+from app.config import Config
     
 
 class NoteBase(BaseModel):
@@ -20,4 +24,129 @@ class FolderCreate(BaseModel):
 
 class MoveNotesRequest(BaseModel):
     note_ids: List[int]
-    folder_id: int
\ No newline at end of file
+    folder_id: int
+
+class TextOperation(BaseModel):
+    # Позиции - в символах (кодовых точках Unicode) текста после предыдущих операций
+    op: Literal["insert", "delete"]
+    pos: int = Field(..., ge=0)
+    text: str = ""
+    length: int = Field(0, ge=0)
+
+
+class NotePatch(BaseModel):
+    base_version: int
+    operations: List[TextOperation] = Field(..., min_length=1, max_length=Config.NOTE_PATCH_MAX_OPERATIONS)
+
+
+class NoteOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    owner_id: Optional[int] = None
+    folder_id: Optional[int] = None
+    slug: str
+    name: Optional[str] = None
+    text: Optional[str] = None
+    is_public: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    version: Optional[int] = None
+
+
+class NoteSummaryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    owner_id: Optional[int] = None
+    folder_id: Optional[int] = None
+    slug: str
+    name: Optional[str] = None
+    is_public: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    version: Optional[int] = None
+    preview: Optional[str] = None
+
+
+class NoteSearchOut(BaseModel):
+    id: int
+    name: Optional[str] = None
+    folder_id: Optional[int] = None
+    updated_at: Optional[datetime] = None
+    snippet: Optional[str] = None
+    rank: float
+
+
+class FolderOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    owner_id: Optional[int] = None
+    slug: str
+    name: Optional[str] = None
+    color: Optional[str] = None
+    is_public: Optional[bool] = None
+    password_check: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class NoteUpdateOut(BaseModel):
+    message: str
+    note: NoteOut
+
+
+class FolderUpdateOut(BaseModel):
+    message: str
+    folder: FolderOut
+
+
+class NotePage(BaseModel):
+    items: List[NoteOut]
+    next_cursor: Optional[str] = None
+
+
+class NoteSummaryPage(BaseModel):
+    items: List[NoteSummaryOut]
+    next_cursor: Optional[str] = None
+
+
+class FolderPage(BaseModel):
+    items: List[FolderOut]
+    next_cursor: Optional[str] = None
+
+
+class NoteRevisionOut(BaseModel):
+    version: int
+    kind: str
+    name: Optional[str] = None
+    size: int
+    created_at: Optional[datetime] = None
+
+
+class NoteRevisionPage(BaseModel):
+    current_version: int
+    items: List[NoteRevisionOut]
+    next_cursor: Optional[str] = None
+
+
+class NoteRevisionText(BaseModel):
+    note_id: int
+    version: int
+    name: Optional[str] = None
+    text: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "move", "delete"]
+    entity: Literal["note", "folder"] = "note"
+    id: Optional[int] = None
+    folder_id: Optional[int] = None
+    data: Optional[dict] = None
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=Config.BATCH_MAX_OPERATIONS)
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
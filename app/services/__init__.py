@@ -0,0 +1,43 @@
+from .notes import (
+    get_all_notes, get_note, get_note_by_slug, get_notes_by_user, get_notes_by_folder,
+    get_note_summaries,
+)
+from .folders import get_folder, get_folder_by_slug, get_folders_by_user
+from .pagination import encode_cursor, decode_cursor, paginate
+from .search import search_notes
+from .imports import iter_lines, import_notes
+from .export import export_ndjson, export_zip
+from .events import user_channel, queue_event, pending_events, discard_events
+from .sync import (
+    ResyncRequired, changes_key, sync_horizon_key, next_change_seq, change_stamp,
+    add_tombstones, get_changes, compact_tombstones, run_tombstone_compaction,
+)
+from .bulk import move_notes, delete_notes
+from .batch import run_batch
+from .edits import VersionConflict, apply_text_operations, patch_note
+from .revisions import diff_ops, apply_ops, get_revisions, get_revision
+from .versions import (
+    note_key, folder_key, user_notes_key, user_folders_key,
+    get_version, bump_versions, make_etag, etag_matches, resource_etag,
+    set_etag, not_modified,
+)
+
+__all__ = [
+    'get_all_notes', 'get_note', 'get_note_by_slug', 'get_notes_by_user', 'get_notes_by_folder',
+    'get_note_summaries',
+    'get_folder', 'get_folder_by_slug', 'get_folders_by_user',
+    'encode_cursor', 'decode_cursor', 'paginate',
+    'search_notes',
+    'iter_lines', 'import_notes',
+    'export_ndjson', 'export_zip',
+    'user_channel', 'queue_event', 'pending_events', 'discard_events',
+    'ResyncRequired', 'changes_key', 'sync_horizon_key', 'next_change_seq', 'change_stamp',
+    'add_tombstones', 'get_changes', 'compact_tombstones', 'run_tombstone_compaction',
+    'move_notes', 'delete_notes',
+    'run_batch',
+    'VersionConflict', 'apply_text_operations', 'patch_note',
+    'diff_ops', 'apply_ops', 'get_revisions', 'get_revision',
+    'note_key', 'folder_key', 'user_notes_key', 'user_folders_key',
+    'get_version', 'bump_versions', 'make_etag', 'etag_matches', 'resource_etag',
+    'set_etag', 'not_modified',
+]
@@ -0,0 +1,166 @@
+import contextlib
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Folder, Note
+from app.schemas import BatchOperation, FolderCreate, NoteBase
+from app.slugs import folder_slug, note_slug
+from app.services.events import discard_events, pending_events
+from app.services.versions import (
+    bump_versions, folder_key, note_key, user_folders_key, user_notes_key,
+)
+
+
+async def _owned(db: AsyncSession, model, user_id: int, object_id):
+    if object_id is None:
+        raise ValueError("Не указан id")
+
+    obj = await db.scalar(select(model).where(model.id == object_id, model.owner_id == user_id))
+    if obj is None:
+        raise ValueError("Объект не найден")
+    return obj
+
+
+async def _check_folder(db: AsyncSession, user_id: int, folder_id):
+    if folder_id is not None:
+        await _owned(db, Folder, user_id, folder_id)
+
+
+def _folder_fields(data: FolderCreate) -> dict:
+    fields = data.model_dump(exclude_unset=True)
+    if "password" in fields:
+        fields["hash_password"] = fields.pop("password")
+    return fields
+
+
+async def _create_note(db: AsyncSession, user_id: int, operation: BatchOperation):
+    data = NoteBase.model_validate(operation.data or {})
+    await _check_folder(db, user_id, data.folder_id)
+
+    note = Note(owner_id=user_id, slug=note_slug(), **data.model_dump())
+    db.add(note)
+    await db.flush()
+    return note.id, [note_key(note.id), user_notes_key(user_id)]
+
+
+async def _update_note(db: AsyncSession, user_id: int, operation: BatchOperation):
+    note = await _owned(db, Note, user_id, operation.id)
+    data = NoteBase.model_validate(operation.data or {})
+    await _check_folder(db, user_id, data.folder_id)
+
+    for field, value in data.model_dump(exclude_unset=True).items():
+        setattr(note, field, value)
+    await db.flush()
+    return note.id, [note_key(note.id), user_notes_key(user_id)]
+
+
+async def _move_note(db: AsyncSession, user_id: int, operation: BatchOperation):
+    note = await _owned(db, Note, user_id, operation.id)
+    await _check_folder(db, user_id, operation.folder_id)
+
+    note.folder_id = operation.folder_id
+    await db.flush()
+    return note.id, [note_key(note.id), user_notes_key(user_id)]
+
+
+async def _delete_note(db: AsyncSession, user_id: int, operation: BatchOperation):
+    note = await _owned(db, Note, user_id, operation.id)
+    await db.delete(note)
+    await db.flush()
+    return note.id, [note_key(note.id), user_notes_key(user_id)]
+
+
+async def _create_folder(db: AsyncSession, user_id: int, operation: BatchOperation):
+    data = FolderCreate.model_validate(operation.data or {})
+    folder = Folder(owner_id=user_id, slug=folder_slug(), **_folder_fields(data))
+    db.add(folder)
+    await db.flush()
+    return folder.id, [folder_key(folder.id), user_folders_key(user_id)]
+
+
+async def _update_folder(db: AsyncSession, user_id: int, operation: BatchOperation):
+    folder = await _owned(db, Folder, user_id, operation.id)
+    data = FolderCreate.model_validate(operation.data or {})
+
+    for field, value in _folder_fields(data).items():
+        setattr(folder, field, value)
+    await db.flush()
+    return folder.id, [folder_key(folder.id), user_folders_key(user_id)]
+
+
+async def _delete_folder(db: AsyncSession, user_id: int, operation: BatchOperation):
+    folder = await _owned(db, Folder, user_id, operation.id)
+
+    # Заметки папки остаются без папки (это делает хук в services.sync)
+    released = (await db.scalars(select(Note.id).where(Note.folder_id == folder.id))).all()
+    await db.delete(folder)
+    await db.flush()
+    return folder.id, (
+        [folder_key(folder.id), user_folders_key(user_id), user_notes_key(user_id)]
+        + [note_key(note_id) for note_id in released]
+    )
+
+
+async def _begin_for_savepoints(db: AsyncSession):
+    # pysqlite не открывает транзакцию перед SAVEPOINT, и RELEASE первого
+    # из них закоммитил бы всё раньше времени - открываем её явно
+    connection = await db.connection()
+    if connection.dialect.name == "sqlite":
+        await connection.exec_driver_sql("BEGIN")
+
+
+HANDLERS = {
+    ("note", "create"): _create_note,
+    ("note", "update"): _update_note,
+    ("note", "move"): _move_note,
+    ("note", "delete"): _delete_note,
+    ("folder", "create"): _create_folder,
+    ("folder", "update"): _update_folder,
+    ("folder", "delete"): _delete_folder,
+}
+
+
+async def run_batch(db: AsyncSession, user_id: int, operations, mode: str = "all_or_nothing"):
+    """
+    Выполняет операции по порядку в одной транзакции с одним коммитом.
+
+    all_or_nothing - первая же ошибка откатывает всё, остальные операции
+    не выполняются. best_effort - каждая операция идёт в своём SAVEPOINT,
+    ошибочная откатывается одна, остальные коммитятся.
+    """
+    best_effort = mode == "best_effort"
+    results = []
+    keys = set()
+    if best_effort:
+        await _begin_for_savepoints(db)
+
+    for index, operation in enumerate(operations):
+        handler = HANDLERS.get((operation.entity, operation.op))
+        events_mark = pending_events(db)
+        try:
+            if handler is None:
+                raise ValueError("Операция не поддерживается")
+
+            async with db.begin_nested() if best_effort else contextlib.nullcontext():
+                object_id, op_keys = await handler(db, user_id, operation)
+
+            keys.update(op_keys)
+            results.append({"index": index, "status": "ok", "id": object_id})
+
+        except Exception as e:
+            discard_events(db, events_mark)
+            results.append({"index": index, "status": "error", "error": str(e)})
+            if not best_effort:
+                await db.rollback()
+                for result in results[:-1]:
+                    result["status"] = "rolled_back"
+                results += [
+                    {"index": skipped, "status": "skipped"}
+                    for skipped in range(index + 1, len(operations))
+                ]
+                return {"committed": False, "results": results}
+
+    await bump_versions(db, keys)
+    await db.commit()
+    return {"committed": True, "results": results}
@@ -0,0 +1,95 @@
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import query_log
+from app.config import Config
+from app.models import Folder, Note, NoteRevision
+from app.services.events import queue_event
+from app.services.sync import add_tombstones, change_stamp, next_change_seq
+from app.services.versions import bump_versions, note_key, user_notes_key
+
+
+def chunked(ids: Iterable[int], size: int):
+    # Длинные списки id режутся, чтобы не упереться в лимит параметров
+    # (999 в старых SQLite, 32767 в asyncpg)
+    ids = list(dict.fromkeys(ids))
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+async def _execute_for_ids(db: AsyncSession, statement, supports_returning: bool) -> List[int]:
+    """
+    Выполняет UPDATE/DELETE и возвращает id затронутых строк: через
+    RETURNING, если диалект умеет, иначе предварительным SELECT по тому же
+    условию внутри той же транзакции.
+    """
+    if supports_returning:
+        return list((await db.scalars(statement.returning(Note.id))).all())
+
+    found = (await db.scalars(select(Note.id).where(statement.whereclause))).all()
+    await db.execute(statement)
+    return list(found)
+
+
+async def move_notes(db: AsyncSession, user_id: int, note_ids: Iterable[int],
+                     folder_id: Optional[int], chunk_size: int = Config.BULK_CHUNK_SIZE) -> List[int]:
+    """
+    Переносит заметки пользователя в его папку (None - убрать из папки).
+    Чужие и несуществующие id пропускаются. Возвращает id перенесённых
+    заметок, транзакцию не коммитит.
+    """
+    if folder_id is not None:
+        owner_id = await db.scalar(select(Folder.owner_id).where(Folder.id == folder_id))
+        if owner_id != user_id:
+            raise ValueError("Папка не найдена")
+
+    supports_returning = db.get_bind().dialect.update_returning
+    stamp = await change_stamp(db, user_id)
+    moved = []
+    with query_log.batched():
+        for chunk in chunked(note_ids, chunk_size):
+            statement = (
+                update(Note)
+                .where(Note.owner_id == user_id, Note.id.in_(chunk))
+                .values(folder_id=folder_id, **stamp)
+                .execution_options(synchronize_session=False)
+            )
+            moved += await _execute_for_ids(db, statement, supports_returning)
+
+    if moved:
+        queue_event(db, user_id, "note", "changed", moved, stamp["change_seq"])
+        await bump_versions(db, [note_key(note_id) for note_id in moved] + [user_notes_key(user_id)])
+    return moved
+
+
+async def delete_notes(db: AsyncSession, user_id: int, note_ids: Iterable[int],
+                       chunk_size: int = Config.BULK_CHUNK_SIZE) -> List[int]:
+    """
+    Удаляет заметки пользователя. Чужие и несуществующие id пропускаются.
+    Возвращает id удалённых заметок, транзакцию не коммитит.
+    """
+    supports_returning = db.get_bind().dialect.delete_returning
+    change_seq = await next_change_seq(db, user_id)
+    deleted = []
+    with query_log.batched():
+        for chunk in chunked(note_ids, chunk_size):
+            # История уходит вместе с заметкой (SQLite не соблюдает ON DELETE CASCADE)
+            await db.execute(
+                delete(NoteRevision)
+                .where(NoteRevision.owner_id == user_id, NoteRevision.note_id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            )
+            statement = (
+                delete(Note)
+                .where(Note.owner_id == user_id, Note.id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            )
+            deleted += await _execute_for_ids(db, statement, supports_returning)
+
+    if deleted:
+        await add_tombstones(db, user_id, "note", deleted, change_seq)
+        queue_event(db, user_id, "note", "deleted", deleted, change_seq)
+        await bump_versions(db, [note_key(note_id) for note_id in deleted] + [user_notes_key(user_id)])
+    return deleted
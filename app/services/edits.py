@@ -0,0 +1,58 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.models import Note
+from app.services.versions import bump_versions, note_key, user_notes_key
+
+
+class VersionConflict(Exception):
+    """Заметку успели изменить: правка сделана не от текущей версии"""
+
+    def __init__(self, version: Optional[int] = None):
+        super().__init__("Заметка изменена, версия не совпадает")
+        self.version = version
+
+
+def apply_text_operations(text: str, operations) -> str:
+    """
+    Применяет вставки и удаления по очереди: позиция каждой операции
+    отсчитывается в тексте, уже изменённом предыдущими.
+    """
+    for operation in operations:
+        if operation.pos > len(text):
+            raise ValueError("Позиция за пределами текста")
+
+        if operation.op == "insert":
+            text = text[:operation.pos] + operation.text + text[operation.pos:]
+        else:
+            end = operation.pos + operation.length
+            if end > len(text):
+                raise ValueError("Удаление за пределами текста")
+            text = text[:operation.pos] + text[end:]
+    return text
+
+
+async def patch_note(db: AsyncSession, user_id: int, note_id: int, base_version: int,
+                     operations) -> Optional[Note]:
+    """
+    Применяет правки к тексту заметки, если она всё ещё в версии
+    base_version. Гонку двух правок от одной версии ловит UPDATE ... WHERE
+    version = base_version (version_id_col у Note). Не коммитит.
+    """
+    note = await db.scalar(select(Note).where(Note.id == note_id, Note.owner_id == user_id))
+    if note is None:
+        return None
+    if note.version != base_version:
+        raise VersionConflict(note.version)
+
+    note.text = apply_text_operations(note.text or "", operations)
+    try:
+        await db.flush()
+    except StaleDataError:
+        raise VersionConflict()
+
+    await bump_versions(db, [note_key(note.id), user_notes_key(user_id)])
+    return note
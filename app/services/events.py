@@ -0,0 +1,78 @@
+import asyncio
+from collections import defaultdict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.database import mark_written
+from app.events import broker
+
+# Ссылки на задачи публикации, чтобы их не собрал сборщик мусора
+_publishing = set()
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def _session(db) -> Session:
+    return getattr(db, "sync_session", db)
+
+
+def queue_event(db, user_id: int, entity: str, op: str, ids, change_seq: int):
+    """
+    Откладывает событие до коммита транзакции. ids - список id или
+    объектов (id новых объектов известен только после flush), None -
+    изменений слишком много, клиенту проще пересинхронизироваться.
+    """
+    _session(db).info.setdefault("events", []).append((user_id, entity, op, ids, change_seq))
+
+
+def pending_events(db) -> int:
+    return len(_session(db).info.get("events", ()))
+
+
+def discard_events(db, since: int = 0):
+    """Отбрасывает события, накопленные после отметки pending_events (откат SAVEPOINT)"""
+    events = _session(db).info.get("events")
+    if events:
+        del events[since:]
+
+
+def _messages(events):
+    grouped = defaultdict(lambda: {"ids": [], "change_seq": 0})
+    for user_id, entity, op, ids, change_seq in events:
+        message = grouped[(user_id, entity, op)]
+        message["change_seq"] = max(message["change_seq"], change_seq)
+        if ids is None or message["ids"] is None:
+            message["ids"] = None
+        else:
+            message["ids"] += [getattr(item, "id", item) for item in ids]
+
+    for (user_id, entity, op), message in grouped.items():
+        yield user_channel(user_id), {"entity": entity, "op": op, **message}
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session):
+    events = session.info.pop("events", None)
+    if not events:
+        return
+    # События есть у каждой записи - по ним же чтения автора ненадолго
+    # переводятся с реплики на основную базу
+    mark_written({user_id for user_id, *_ in events})
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Синхронный движок (alembic, скрипты) - слушателей в процессе нет
+        return
+
+    for channel, message in _messages(events):
+        task = loop.create_task(broker.publish(channel, message))
+        _publishing.add(task)
+        task.add_done_callback(_publishing.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_events(session):
+    session.info.pop("events", None)
@@ -0,0 +1,71 @@
+import io
+import zipfile
+
+import orjson
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models import Folder, Note
+from app.services.folders import FOLDER_COLUMNS
+from app.services.notes import NOTE_COLUMNS
+
+EXPORT_YIELD_PER = 500
+
+
+class _ChunkSink(io.RawIOBase):
+    """Несикаемый поток для ZipFile: всё записанное забирается через drain()"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _iter_rows(db, query):
+    # Серверный курсор: строки приходят пачками по EXPORT_YIELD_PER
+    result = await db.stream(query.execution_options(yield_per=EXPORT_YIELD_PER))
+    async for row in result.mappings():
+        yield dict(row)
+
+
+def _user_queries(user_id: int):
+    # Порядок индексов (owner_id, updated_at): поток идёт без сортировки всей выборки
+    return (
+        ("folder", select(*FOLDER_COLUMNS).where(Folder.owner_id == user_id)
+         .order_by(Folder.updated_at, Folder.id)),
+        ("note", select(*NOTE_COLUMNS).where(Note.owner_id == user_id)
+         .order_by(Note.updated_at, Note.id)),
+    )
+
+
+async def export_ndjson(user_id: int):
+    async with AsyncSessionLocal() as db:
+        for kind, query in _user_queries(user_id):
+            async for row in _iter_rows(db, query):
+                yield orjson.dumps({"type": kind, **row}) + b"\n"
+
+
+async def export_zip(user_id: int):
+    """folders.ndjson и notes.ndjson в zip, собираемом на лету"""
+    sink = _ChunkSink()
+    async with AsyncSessionLocal() as db:
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for kind, query in _user_queries(user_id):
+                with archive.open(f"{kind}s.ndjson", mode="w", force_zip64=True) as entry:
+                    async for row in _iter_rows(db, query):
+                        entry.write(orjson.dumps(row) + b"\n")
+                        data = sink.drain()
+                        if data:
+                            yield data
+                yield sink.drain()
+    yield sink.drain()
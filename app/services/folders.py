@@ -0,0 +1,27 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Folder
+from app.services.pagination import paginate
+
+# hash_password наружу не отдаётся
+FOLDER_COLUMNS = (
+    Folder.id, Folder.owner_id, Folder.slug, Folder.name, Folder.color,
+    Folder.is_public, Folder.password_check, Folder.created_at, Folder.updated_at,
+)
+
+
+async def get_folder(db: AsyncSession, folder_id: int) -> Optional[Folder]:
+    return await db.scalar(select(Folder).where(Folder.id == folder_id))
+
+
+async def get_folder_by_slug(db: AsyncSession, slug: str) -> Optional[Folder]:
+    return await db.scalar(select(Folder).where(Folder.slug == slug))
+
+
+async def get_folders_by_user(db: AsyncSession, user_id: int,
+                              cursor: Optional[str] = None, limit: Optional[int] = None):
+    query = select(*FOLDER_COLUMNS).where(Folder.owner_id == user_id)
+    return await paginate(db, query, Folder, cursor, limit, scalars=False)
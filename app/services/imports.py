@@ -0,0 +1,108 @@
+import json
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import query_log
+from app.config import Config
+from app.models import Note
+from app.schemas import NoteBase
+from app.slugs import note_slug
+from app.services.events import queue_event
+from app.services.sync import next_change_seq
+from app.services.versions import bump_versions, user_notes_key
+
+
+async def iter_lines(chunks, max_line_bytes: int):
+    """
+    Режет поток байтов на строки, не держа в памяти больше одной строки.
+    Слишком длинная строка отдаётся как None и пропускается до конца.
+    """
+    # bytearray дописывается на месте: склейка bytes копировала бы весь
+    # накопленный хвост на каждом куске
+    buffer = bytearray()
+    skipping = False
+    async for chunk in chunks:
+        # Перевод строки ищется только в новых байтах
+        scanned = len(buffer)
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", scanned)) != -1:
+            yield None if skipping or end - start > max_line_bytes else bytes(buffer[start:end])
+            skipping = False
+            start = scanned = end + 1
+        del buffer[:start]
+
+        if len(buffer) > max_line_bytes:
+            skipping = True
+            buffer.clear()
+
+    if skipping:
+        yield None
+    elif buffer:
+        yield bytes(buffer)
+
+
+def parse_note(line: bytes) -> NoteBase:
+    return NoteBase.model_validate(json.loads(line))
+
+
+async def import_notes(db: AsyncSession, user_id: int, lines, batch_size: int):
+    report = {"imported": 0, "failed": 0, "errors": []}
+    batch, batch_lines = [], []
+
+    def fail(line_no: int, error: str):
+        report["failed"] += 1
+        if len(report["errors"]) < Config.IMPORT_MAX_ERRORS:
+            report["errors"].append({"line": line_no, "error": error})
+
+    async def flush():
+        try:
+            # Одни и те же запросы на каждую пачку - не N+1
+            with query_log.batched():
+                change_seq = await next_change_seq(db, user_id)
+                await db.execute(insert(Note), [{**row, "change_seq": change_seq} for row in batch])
+                # id вставленных строк не возвращаются - клиенту придётся пересинхронизироваться
+                queue_event(db, user_id, "note", "changed", None, change_seq)
+                await bump_versions(db, [user_notes_key(user_id)])
+                await db.commit()
+            report["imported"] += len(batch)
+        except Exception as e:
+            await db.rollback()
+            for line_no in batch_lines:
+                fail(line_no, f"Ошибка записи пачки: {e}")
+        batch.clear()
+        batch_lines.clear()
+
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if line is None:
+            fail(line_no, "Строка длиннее допустимого")
+            continue
+        if not line.strip():
+            continue
+
+        try:
+            note = parse_note(line)
+        except (ValueError, ValidationError) as e:
+            fail(line_no, str(e))
+            continue
+
+        batch.append({
+            "owner_id": user_id,
+            "folder_id": note.folder_id,
+            "slug": note_slug(),
+            "text": note.text,
+            "name": note.name,
+            "is_public": note.is_public,
+        })
+        batch_lines.append(line_no)
+        if len(batch) >= batch_size:
+            await flush()
+
+    if batch:
+        await flush()
+
+    return report
@@ -0,0 +1,61 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import Config
+from app.models import Note
+from app.models.types import note_preview
+from app.services.pagination import paginate
+
+# Списки выбираются колонками, а не ORM-объектами: строки сразу
+# сериализуются в JSON без гидратации моделей.
+# view=summary: всё, кроме тела заметки, плюс короткое превью,
+# обрезанное на стороне БД (сжатое тело распаковывается только в начале)
+SUMMARY_COLUMNS = (
+    Note.id, Note.owner_id, Note.folder_id, Note.slug, Note.name,
+    Note.is_public, Note.created_at, Note.updated_at, Note.version,
+)
+NOTE_COLUMNS = SUMMARY_COLUMNS + (Note.text,)
+
+
+def _select_notes(view: str):
+    if view == "summary":
+        preview = note_preview(Note.text, Config.PREVIEW_LENGTH).label("preview")
+        return select(*SUMMARY_COLUMNS, preview)
+    return select(*NOTE_COLUMNS)
+
+
+async def get_all_notes(db: AsyncSession, cursor: Optional[str] = None, limit: Optional[int] = None,
+                        view: str = "full"):
+    return await paginate(db, _select_notes(view), Note, cursor, limit, scalars=False)
+
+
+async def get_note(db: AsyncSession, note_id: int) -> Optional[Note]:
+    return await db.scalar(select(Note).where(Note.id == note_id))
+
+
+async def get_note_by_slug(db: AsyncSession, slug: str) -> Optional[Note]:
+    return await db.scalar(select(Note).where(Note.slug == slug))
+
+
+async def get_notes_by_user(db: AsyncSession, user_id: int,
+                            cursor: Optional[str] = None, limit: Optional[int] = None,
+                            view: str = "full"):
+    query = _select_notes(view).where(Note.owner_id == user_id)
+    return await paginate(db, query, Note, cursor, limit, scalars=False)
+
+
+async def get_notes_by_folder(db: AsyncSession, user_id: int, folder_id: int,
+                              cursor: Optional[str] = None, limit: Optional[int] = None,
+                              view: str = "full"):
+    query = _select_notes(view).where(Note.owner_id == user_id).where(Note.folder_id == folder_id)
+    return await paginate(db, query, Note, cursor, limit, scalars=False)
+
+
+async def get_note_summaries(db: AsyncSession, user_id: int, note_ids):
+    """Карточки (без текста) заметок пользователя из note_ids; чужие и удалённые пропускаются"""
+    rows = await db.execute(
+        select(*SUMMARY_COLUMNS).where(Note.owner_id == user_id, Note.id.in_(note_ids))
+    )
+    return [dict(row) for row in rows.mappings()]
@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(updated_at: datetime, obj_id: int) -> str:
+    raw = json.dumps([updated_at.isoformat(), obj_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, obj_id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), int(obj_id)
+    except (ValueError, TypeError):
+        raise ValueError("Некорректный курсор")
+
+
+def _rows(result, scalars: bool):
+    if scalars:
+        return result.scalars().all()
+    return [dict(row) for row in result.mappings()]
+
+
+def _key(item):
+    if isinstance(item, dict):
+        return item["updated_at"], item["id"]
+    return item.updated_at, item.id
+
+
+async def paginate(db: AsyncSession, query, model, cursor: Optional[str] = None,
+                   limit: Optional[int] = None, scalars: bool = True):
+    """
+    Keyset-пагинация по (updated_at, id), от новых к старым.
+    limit=None отдаёт всё без курсора. scalars=False - для выборки
+    отдельных колонок: элементы страницы будут словарями.
+    """
+    if cursor:
+        updated_at, last_id = decode_cursor(cursor)
+        query = query.where(or_(
+            model.updated_at < updated_at,
+            and_(model.updated_at == updated_at, model.id < last_id),
+        ))
+
+    query = query.order_by(model.updated_at.desc(), model.id.desc())
+    if limit is None:
+        result = await db.execute(query)
+        return {"items": _rows(result, scalars), "next_cursor": None}
+
+    result = await db.execute(query.limit(limit + 1))
+    items = _rows(result, scalars)
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(*_key(items[-1]))
+
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,190 @@
+import difflib
+import zlib
+from itertools import accumulate
+from typing import Optional
+
+import orjson
+from sqlalchemy import delete, event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import Config
+from app.models import Note, NoteRevision
+
+REVISION_COLUMNS = (
+    NoteRevision.version, NoteRevision.kind, NoteRevision.name,
+    NoteRevision.size, NoteRevision.created_at,
+)
+
+# Короче этого изменённая середина текста хранится одной заменой,
+# длиннее - сравнивается построчно
+LINE_DIFF_MIN = 1024
+
+
+def _common_prefix(a: str, b: str) -> int:
+    # Двоичный поиск по срезам: сравнение строк идёт в C, а не посимвольно в Python
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def diff_ops(new: str, old: str) -> list:
+    """
+    Операции [start, end, text], превращающие new в old: new[start:end]
+    заменяется на text. Позиции - в new, по возрастанию.
+    """
+    prefix = _common_prefix(new, old)
+    suffix = _common_suffix(new, old, min(len(new), len(old)) - prefix)
+    new_middle = new[prefix:len(new) - suffix]
+    old_middle = old[prefix:len(old) - suffix]
+    if not new_middle and not old_middle:
+        return []
+    if len(new_middle) + len(old_middle) <= LINE_DIFF_MIN:
+        return [[prefix, prefix + len(new_middle), old_middle]]
+
+    new_lines = new_middle.splitlines(keepends=True)
+    old_lines = old_middle.splitlines(keepends=True)
+    offsets = list(accumulate(map(len, new_lines), initial=prefix))
+    return [
+        [offsets[i1], offsets[i2], "".join(old_lines[j1:j2])]
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, new_lines, old_lines).get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def apply_ops(text: str, ops) -> str:
+    pieces = []
+    position = 0
+    for start, end, replacement in ops:
+        pieces += [text[position:start], replacement]
+        position = end
+    pieces.append(text[position:])
+    return "".join(pieces)
+
+
+def _pack(value) -> bytes:
+    return zlib.compress(value, Config.NOTE_COMPRESS_LEVEL)
+
+
+def _before(state, key: str):
+    # Значение атрибута до изменений в этой сессии
+    history = state.attrs[key].load_history()
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(state.obj(), key)
+
+
+@event.listens_for(Session, "before_flush")
+def _record_revisions(session, flush_context, instances):
+    """
+    Перед каждым ORM-UPDATE заметки сохраняет её прошлую версию: каждая
+    Config.NOTE_REVISION_SNAPSHOT_EVERY-я - целиком, остальные - обратной
+    разницей от следующей версии. Удалённая заметка уносит историю с собой.
+    """
+    for note in [obj for obj in session.dirty if isinstance(obj, Note) and session.is_modified(obj)]:
+        state = inspect(note)
+        old_text = _before(state, "text") or ""
+        if note.version % Config.NOTE_REVISION_SNAPSHOT_EVERY == 0:
+            kind, data = "snapshot", _pack(old_text.encode())
+        else:
+            kind, data = "delta", _pack(orjson.dumps(diff_ops(note.text or "", old_text)))
+
+        session.add(NoteRevision(
+            note_id=note.id, owner_id=note.owner_id, version=note.version, kind=kind,
+            name=_before(state, "name"), size=len(old_text), data=data,
+            created_at=_before(state, "updated_at"),
+        ))
+
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Note)]
+    if deleted:
+        session.connection().execute(delete(NoteRevision).where(NoteRevision.note_id.in_(deleted)))
+
+
+async def get_revisions(db: AsyncSession, user_id: int, note_id: int,
+                        cursor: Optional[str] = None, limit: int = Config.PAGE_SIZE):
+    """Прошлые версии заметки от новых к старым, курсор - номер версии"""
+    current_version = await db.scalar(
+        select(Note.version).where(Note.id == note_id, Note.owner_id == user_id)
+    )
+    if current_version is None:
+        return None
+
+    query = select(*REVISION_COLUMNS).where(NoteRevision.note_id == note_id)
+    if cursor:
+        try:
+            query = query.where(NoteRevision.version < int(cursor))
+        except ValueError:
+            raise ValueError("Некорректный курсор")
+
+    result = await db.execute(query.order_by(NoteRevision.version.desc()).limit(limit + 1))
+    items = [dict(row) for row in result.mappings()]
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = str(items[-1]["version"])
+    return {"current_version": current_version, "items": items, "next_cursor": next_cursor}
+
+
+async def get_revision(db: AsyncSession, user_id: int, note_id: int, version: int) -> Optional[dict]:
+    """
+    Текст заметки в версии version. Восстановление начинается с ближайшего
+    снимка выше (или с текущего текста) и проходит не больше
+    NOTE_REVISION_SNAPSHOT_EVERY разниц.
+    """
+    note = (await db.execute(
+        select(Note.version, Note.name, Note.text, Note.updated_at)
+        .where(Note.id == note_id, Note.owner_id == user_id)
+    )).one_or_none()
+    if note is None or not 1 <= version <= note.version:
+        return None
+    if version == note.version:
+        return {"note_id": note_id, "version": version, "name": note.name,
+                "text": note.text, "created_at": note.updated_at}
+
+    # Ближайший снимок не ниже version; если его нет - идём от текущего текста
+    snapshot = await db.scalar(
+        select(NoteRevision.version)
+        .where(NoteRevision.note_id == note_id, NoteRevision.version >= version,
+               NoteRevision.kind == "snapshot")
+        .order_by(NoteRevision.version)
+        .limit(1)
+    )
+    upper = snapshot if snapshot is not None else note.version - 1
+    rows = (await db.execute(
+        select(NoteRevision.version, NoteRevision.kind, NoteRevision.name,
+               NoteRevision.data, NoteRevision.created_at)
+        .where(NoteRevision.note_id == note_id, NoteRevision.version.between(version, upper))
+        .order_by(NoteRevision.version.desc())
+    )).all()
+    if len(rows) != upper - version + 1:
+        # Версии до появления истории не сохранились
+        return None
+
+    text = note.text or ""
+    for row in rows:
+        if row.kind == "snapshot":
+            text = zlib.decompress(row.data).decode()
+        else:
+            text = apply_ops(text, orjson.loads(zlib.decompress(row.data)))
+
+    return {"note_id": note_id, "version": version, "name": rows[-1].name,
+            "text": text, "created_at": rows[-1].created_at}
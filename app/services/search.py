@@ -0,0 +1,68 @@
+import html
+import re
+from typing import Optional
+
+from sqlalchemy import DateTime, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SQLITE_SEARCH = text("""
+    SELECT notes.id, notes.name, notes.folder_id, notes.updated_at,
+           snippet(notes_fts, -1, :match_start, :match_end, '…', 16) AS snippet,
+           bm25(notes_fts) AS rank
+    FROM notes_fts
+    JOIN notes ON notes.id = notes_fts.rowid
+    WHERE notes_fts MATCH :query AND notes.owner_id = :owner_id
+    ORDER BY rank
+    LIMIT :limit
+""").columns(updated_at=DateTime)
+
+POSTGRES_SEARCH = text("""
+    SELECT notes.id, notes.name, notes.folder_id, notes.updated_at,
+           ts_headline('simple', coalesce(notes.text, ''), query, :headline_options) AS snippet,
+           ts_rank(notes.search_vector, query) AS rank
+    FROM notes, websearch_to_tsquery('simple', :query) AS query
+    WHERE notes.owner_id = :owner_id AND notes.search_vector @@ query
+    ORDER BY rank DESC
+    LIMIT :limit
+""").columns(updated_at=DateTime)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Текст заметки - пользовательский: БД отмечает совпадения управляющими
+# символами, а <mark> подставляется уже после экранирования HTML
+MATCH_START, MATCH_END = "\x02", "\x03"
+HEADLINE_OPTIONS = f"StartSel={MATCH_START}, StopSel={MATCH_END}, MaxFragments=1, MaxWords=16"
+
+
+def highlight(snippet: Optional[str]) -> Optional[str]:
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+
+
+def to_fts5_query(query: str) -> str:
+    # Пользовательский ввод не должен попадать в синтаксис FTS5 как есть:
+    # каждое слово в кавычках, последнее - префиксом для поиска по мере ввода
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return ""
+    return " ".join(f'"{token}"' for token in tokens) + "*"
+
+
+async def search_notes(db: AsyncSession, user_id: int, query: str, limit: int):
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        statement, query = SQLITE_SEARCH, to_fts5_query(query)
+    elif dialect == "postgresql":
+        statement = POSTGRES_SEARCH
+    else:
+        raise ValueError(f"Поиск не поддерживается для {dialect}")
+
+    if not query.strip():
+        return []
+
+    result = await db.execute(statement, {
+        "query": query, "owner_id": user_id, "limit": limit,
+        "match_start": MATCH_START, "match_end": MATCH_END, "headline_options": HEADLINE_OPTIONS,
+    })
+    return [{**row, "snippet": highlight(row["snippet"])} for row in result.mappings()]
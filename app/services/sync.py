@@ -0,0 +1,249 @@
+import asyncio
+import base64
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import and_, delete, event, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import Config
+from app.database import AsyncSessionLocal
+from app.models import EntityVersion, Folder, Note, Tombstone
+from app.services.events import queue_event
+from app.services.folders import FOLDER_COLUMNS
+from app.services.notes import NOTE_COLUMNS
+from app.services.versions import UPSERTS, get_version
+
+ENTITIES = {Note: "note", Folder: "folder"}
+
+
+class ResyncRequired(Exception):
+    """Следы удалений после since уже сжаты - клиенту нужна полная синхронизация"""
+
+
+def changes_key(user_id: int) -> str:
+    return f"user:{user_id}:changes"
+
+
+def sync_horizon_key(user_id: int) -> str:
+    return f"user:{user_id}:sync_horizon"
+
+
+def _next_seq_statement(dialect: str, user_id: int):
+    # Строка счётчика блокируется до конца транзакции, поэтому номера
+    # одного пользователя выдаются в порядке коммитов
+    statement = UPSERTS[dialect](EntityVersion).values(key=changes_key(user_id), version=1)
+    return statement.on_conflict_do_update(
+        index_elements=[EntityVersion.key],
+        set_={"version": EntityVersion.version + 1},
+    ).returning(EntityVersion.version)
+
+
+async def next_change_seq(db: AsyncSession, user_id: int) -> int:
+    connection = await db.connection()
+    return await connection.scalar(_next_seq_statement(connection.dialect.name, user_id))
+
+
+async def change_stamp(db: AsyncSession, user_id: int) -> dict:
+    """Значения колонок для UPDATE/INSERT в обход ORM"""
+    return {"change_seq": await next_change_seq(db, user_id), "updated_at": datetime.utcnow()}
+
+
+async def add_tombstones(db: AsyncSession, user_id: int, entity: str, ids, change_seq: int):
+    if ids:
+        await db.execute(insert(Tombstone), [
+            {"owner_id": user_id, "entity": entity, "entity_id": entity_id, "change_seq": change_seq}
+            for entity_id in ids
+        ])
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_changes(session, flush_context, instances):
+    """
+    Каждая запись заметки или папки через ORM получает следующий номер в
+    последовательности владельца и свежий updated_at, удаление оставляет
+    след (Tombstone). Запросы в обход ORM ставят метки сами (change_stamp).
+    """
+    changed = [obj for obj in session.new if type(obj) in ENTITIES]
+    changed += [obj for obj in session.dirty if type(obj) in ENTITIES and session.is_modified(obj)]
+    deleted = [obj for obj in session.deleted if type(obj) in ENTITIES]
+    if not changed and not deleted:
+        return
+
+    connection = session.connection()
+    now = datetime.utcnow()
+    seqs = {}
+
+    def seq_for(owner_id):
+        if owner_id not in seqs:
+            seqs[owner_id] = connection.scalar(_next_seq_statement(connection.dialect.name, owner_id))
+        return seqs[owner_id]
+
+    for obj in changed:
+        if obj.owner_id is None:
+            continue
+        obj.change_seq = seq_for(obj.owner_id)
+        if obj not in session.new:
+            obj.updated_at = now
+        queue_event(session, obj.owner_id, ENTITIES[type(obj)], "changed", [obj], obj.change_seq)
+
+    for obj in deleted:
+        entity = ENTITIES[type(obj)]
+        change_seq = seq_for(obj.owner_id)
+        session.add(Tombstone(owner_id=obj.owner_id, entity=entity, entity_id=obj.id, change_seq=change_seq))
+        queue_event(session, obj.owner_id, entity, "deleted", [obj.id], change_seq)
+
+        if isinstance(obj, Folder):
+            # Заметки удалённой папки остаются без папки - это их изменение
+            released = defaultdict(list)
+            for note_id, owner_id in connection.execute(
+                select(Note.id, Note.owner_id).where(Note.folder_id == obj.id)
+            ):
+                released[owner_id].append(note_id)
+            for owner_id, note_ids in released.items():
+                connection.execute(
+                    update(Note)
+                    .where(Note.id.in_(note_ids))
+                    .values(folder_id=None, change_seq=seq_for(owner_id), updated_at=now)
+                )
+                queue_event(session, owner_id, "note", "changed", note_ids, seq_for(owner_id))
+
+
+SYNC_SOURCES = (
+    ("notes", Note, NOTE_COLUMNS + (Note.change_seq,)),
+    ("folders", Folder, FOLDER_COLUMNS + (Folder.change_seq,)),
+    ("tombstones", Tombstone, (Tombstone.entity, Tombstone.entity_id, Tombstone.change_seq, Tombstone.deleted_at)),
+)
+# Позиция (change_seq, source, id) после всех источников: номер пройден целиком
+SEQ_DONE = len(SYNC_SOURCES)
+
+
+def encode_sync_cursor(change_seq: int, source: int, obj_id: int) -> str:
+    raw = json.dumps([change_seq, source, obj_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_sync_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        change_seq, source, obj_id = (int(value) for value in json.loads(raw))
+    except (ValueError, TypeError):
+        raise ValueError("Некорректный курсор")
+    if change_seq < 0 or not 0 <= source <= SEQ_DONE:
+        raise ValueError("Некорректный курсор")
+    return change_seq, source, obj_id
+
+
+def _after(model, source: int, position):
+    """Строки источника source строго после позиции (change_seq, source, id)"""
+    change_seq, last_source, last_id = position
+    if source > last_source:
+        return model.change_seq >= change_seq
+    if source < last_source:
+        return model.change_seq > change_seq
+    return or_(
+        model.change_seq > change_seq,
+        and_(model.change_seq == change_seq, model.id > last_id),
+    )
+
+
+def _up_to(model, source: int, position):
+    """Строки источника source не дальше позиции (change_seq, source, id)"""
+    change_seq, last_source, last_id = position
+    if source > last_source:
+        return model.change_seq < change_seq
+    if source < last_source:
+        return model.change_seq <= change_seq
+    return or_(
+        model.change_seq < change_seq,
+        and_(model.change_seq == change_seq, model.id <= last_id),
+    )
+
+
+async def get_changes(db: AsyncSession, user_id: int, since: int = 0,
+                      limit: int = Config.PAGE_SIZE, cursor: Optional[str] = None):
+    """
+    Изменения пользователя с номером больше since, не больше limit строк.
+    Порядок - по (change_seq, источник, id), поэтому и одна большая
+    транзакция (импорт, удаление папки) делится на страницы: следующая
+    страница - по next_cursor. next_since - номер, до которого изменения
+    получены целиком; его клиент хранит как since следующей синхронизации.
+    """
+    position = decode_sync_cursor(cursor) if cursor else (since, SEQ_DONE, 0)
+    done = position[0] if position[1] == SEQ_DONE else position[0] - 1
+    if done and done < await get_version(db, sync_horizon_key(user_id)):
+        raise ResyncRequired("Требуется полная синхронизация")
+
+    # При полной выгрузке следы удалений не нужны
+    sources = SYNC_SOURCES if position[0] else SYNC_SOURCES[:2]
+
+    # Сначала только ключи: по ним выбирается граница страницы, а тела
+    # заметок читаются лишь для попавших на неё строк
+    keys = []
+    for source, (_, model, _) in enumerate(sources):
+        rows = await db.execute(
+            select(model.change_seq, model.id)
+            .where(model.owner_id == user_id, _after(model, source, position))
+            .order_by(model.change_seq, model.id)
+            .limit(limit + 1)
+        )
+        keys += [(change_seq, source, obj_id) for change_seq, obj_id in rows]
+    keys.sort()
+    has_more = len(keys) > limit
+    last = keys[limit - 1] if has_more else None
+
+    page = {"has_more": has_more, "tombstones": []}
+    max_seq = done
+    for source, (name, model, columns) in enumerate(sources):
+        query = select(*columns).where(model.owner_id == user_id, _after(model, source, position))
+        if last is not None:
+            query = query.where(_up_to(model, source, last))
+        rows = (await db.execute(query.order_by(model.change_seq, model.id))).mappings().all()
+        page[name] = [dict(row) for row in rows]
+        if rows:
+            max_seq = max(max_seq, rows[-1]["change_seq"])
+
+    # Номер last[0] мог попасть на страницу не целиком
+    page["next_since"] = max(done, last[0] - 1) if has_more else max_seq
+    page["next_cursor"] = encode_sync_cursor(*last) if has_more else None
+    return page
+
+
+async def compact_tombstones(db: AsyncSession, older_than: timedelta) -> int:
+    """Удаляет старые следы и запоминает, до какого номера они сжаты"""
+    cutoff = datetime.utcnow() - older_than
+    horizons = (await db.execute(
+        select(Tombstone.owner_id, func.max(Tombstone.change_seq))
+        .where(Tombstone.deleted_at < cutoff)
+        .group_by(Tombstone.owner_id)
+    )).all()
+    if not horizons:
+        return 0
+
+    statement = UPSERTS[db.get_bind().dialect.name](EntityVersion).values([
+        {"key": sync_horizon_key(owner_id), "version": max_seq} for owner_id, max_seq in horizons
+    ])
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[EntityVersion.key],
+        set_={"version": statement.excluded.version},
+    ))
+    removed = (await db.execute(delete(Tombstone).where(Tombstone.deleted_at < cutoff))).rowcount
+    await db.commit()
+    return removed
+
+
+async def run_tombstone_compaction(interval: int = Config.SYNC_COMPACT_INTERVAL,
+                                   days: int = Config.SYNC_TOMBSTONE_DAYS):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                removed = await compact_tombstones(db, timedelta(days=days))
+            if removed:
+                logger.info(f"Сжато следов удалений: {removed}")
+        except Exception:
+            logger.exception("Не удалось сжать следы удалений")
@@ -0,0 +1,97 @@
+import hashlib
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app import query_log
+from app.config import Config
+from app.models import EntityVersion
+
+# Данные личные: кэшировать можно, но только с перепроверкой по ETag
+CACHE_CONTROL = "private, no-cache"
+
+UPSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": pg_insert,
+}
+
+
+def note_key(note_id: int) -> str:
+    return f"note:{note_id}"
+
+
+def folder_key(folder_id: int) -> str:
+    return f"folder:{folder_id}"
+
+
+def user_notes_key(user_id: int) -> str:
+    return f"user:{user_id}:notes"
+
+
+def user_folders_key(user_id: int) -> str:
+    return f"user:{user_id}:folders"
+
+
+async def get_version(db: AsyncSession, key: str) -> int:
+    version = await db.scalar(select(EntityVersion.version).where(EntityVersion.key == key))
+    return version or 0
+
+
+async def bump_versions(db: AsyncSession, keys, chunk_size: int = Config.BULK_CHUNK_SIZE):
+    """Увеличивает счётчики в текущей транзакции, коммит - за вызывающим"""
+    keys = sorted(set(keys))
+    insert = UPSERTS[db.get_bind().dialect.name]
+    # Два параметра на ключ: массовые операции над тысячами заметок иначе
+    # упираются в лимит параметров (32767 в asyncpg)
+    with query_log.batched():
+        for start in range(0, len(keys), chunk_size):
+            statement = insert(EntityVersion).values([
+                {"key": key, "version": 1} for key in keys[start:start + chunk_size]
+            ])
+            statement = statement.on_conflict_do_update(
+                index_elements=[EntityVersion.key],
+                set_={"version": EntityVersion.version + 1},
+            )
+            await db.execute(statement)
+
+
+def make_etag(version: int, request: Request) -> str:
+    # Разные страницы/параметры одного ресурса - разные представления
+    representation = f"{request.url.path}?{request.url.query}"
+    digest = hashlib.blake2b(representation.encode(), digest_size=8)
+    return f'"{version}-{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+async def resource_etag(db: AsyncSession, request: Request, key: str):
+    """(etag, совпал ли он с If-None-Match) - проверка до чтения самих данных"""
+    version = await get_version(db, key)
+    etag = make_etag(version, request)
+    # Версия 0 - объект ещё не создавался: отвечать 304 не на что
+    return etag, version > 0 and etag_matches(request, etag)
+
+
+def set_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
@@ -0,0 +1,31 @@
+import secrets
+import time
+
+BASE62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+SLUG_ID_LENGTH = 22  # 128 бит в base62
+
+
+def base62(number: int, length: int = SLUG_ID_LENGTH) -> str:
+    chars = []
+    while number:
+        number, rest = divmod(number, 62)
+        chars.append(BASE62[rest])
+    return "".join(reversed(chars)).rjust(length, BASE62[0])
+
+
+def new_slug_id() -> str:
+    """
+    Как ULID: 48 бит миллисекунд + 80 случайных бит. Коллизия возможна
+    только при совпадении 80 случайных бит в одну миллисекунду, а
+    сортировка по slug совпадает с порядком создания.
+    """
+    timestamp = time.time_ns() // 1_000_000
+    return base62((timestamp << 80) | secrets.randbits(80))
+
+
+def note_slug() -> str:
+    return f"note_{new_slug_id()}"
+
+
+def folder_slug() -> str:
+    return f"folder_{new_slug_id()}"
@@ -70,7 +70,9 @@ document.addEventListener('DOMContentLoaded', function () {
 
         if (response.ok) {
             modal.style.display = "none";
-            location.reload();
+            upsertCard('folder', await response.json());
+            form.reset();
+            passwordField.style.display = "none";
         } else {
             const error = await response.json();
             alert('Ошибка: ' + (error.detail || 'Неизвестная ошибка'));
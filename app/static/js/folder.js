@@ -50,18 +50,26 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
         try {
-            const resp = await fetch(`/folder/by_user/${userId}/`, {
-                method: 'GET',
-                headers: { 'Accept': 'application/json' }
-            });
+            // Эндпоинт отдаёт папки страницами — проходим по всем курсорам
+            cachedFolders = [];
+            let cursor = null;
+            do {
+                const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+                const resp = await fetch(`/folder/by_user/${userId}/${query}`, {
+                    method: 'GET',
+                    headers: { 'Accept': 'application/json' }
+                });
 
-            if (!resp.ok) {
-                console.error('Ошибка HTTP при получении папок:', resp.status);
-                cachedFolders = [];
-            } else {
-                const data = await resp.json();
-                cachedFolders = Array.isArray(data) ? data : [];
-            }
+                if (!resp.ok) {
+                    console.error('Ошибка HTTP при получении папок:', resp.status);
+                    cachedFolders = [];
+                    break;
+                }
+
+                const page = await resp.json();
+                cachedFolders.push(...(page.items || []));
+                cursor = page.next_cursor;
+            } while (cursor);
         } catch (err) {
             console.error('Ошибка сети при загрузке папок:', err);
             cachedFolders = [];
@@ -86,6 +86,13 @@ document.addEventListener('DOMContentLoaded', function() {
     setupHorizontalScroll('foldersScroll', 'foldersScrollLeft', 'foldersScrollRight');
     setupHorizontalScroll('notesScroll', 'notesScrollLeft', 'notesScrollRight');
 
+    // Подгрузка следующих страниц папок и заметок
+    setupLoadMore('foldersScroll', 'foldersLoadMore', renderFolderCard);
+    setupLoadMore('notesScroll', 'notesLoadMore', renderNoteCard);
+
+    // Изменения из других вкладок и устройств приходят без перезагрузки
+    setupLiveUpdates();
+
     // Анимация появления карточек при загрузке страницы
     const folderCards = document.querySelectorAll('.folder-card');
     const noteCards = document.querySelectorAll('.note-card');
@@ -149,6 +156,209 @@ function deleteCookie(name) {
     document.cookie = `${name}=; expires=Thu, 01 Jan 1970 00:00:00 UTC; path=/;`;
 }
 
+/**
+ * Приводит дату из API к виду "YYYY-MM-DD HH:MM:SS"
+ * @param {string} value - дата в ISO-формате
+ * @returns {string}
+ */
+function formatDate(value) {
+    return value ? value.replace('T', ' ').slice(0, 19) : '';
+}
+
+// ========================
+// ПАГИНАЦИЯ
+// ========================
+
+/**
+ * Кнопка "Загрузить ещё": запрашивает следующую страницу по курсору
+ * из data-next-cursor контейнера и дописывает карточки в конец
+ * @param {string} containerId - id контейнера с data-list-url и data-next-cursor
+ * @param {string} buttonId - id кнопки
+ * @param {function} renderItem - строит DOM-элемент карточки
+ */
+function setupLoadMore(containerId, buttonId, renderItem) {
+    const container = document.getElementById(containerId);
+    const button = document.getElementById(buttonId);
+
+    if (!container || !button) return;
+
+    const updateButton = () => {
+        button.style.display = container.dataset.nextCursor ? '' : 'none';
+    };
+
+    button.addEventListener('click', async () => {
+        const cursor = container.dataset.nextCursor;
+        if (!cursor) return;
+
+        button.disabled = true;
+        try {
+            const url = new URL(container.dataset.listUrl, window.location.origin);
+            url.searchParams.set('cursor', cursor);
+            const response = await fetch(url, { headers: { 'Accept': 'application/json' } });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+
+            const page = await response.json();
+            page.items.forEach(item => container.appendChild(renderItem(item)));
+            container.dataset.nextCursor = page.next_cursor || '';
+        } catch (err) {
+            console.error('Ошибка при загрузке следующей страницы:', err);
+        } finally {
+            button.disabled = false;
+            updateButton();
+        }
+    });
+
+    updateButton();
+}
+
+function renderFolderCard(folder) {
+    const card = document.createElement('a');
+    card.className = 'folder-card';
+    card.target = '_blank';
+    card.dataset.folderId = folder.id;
+    card.href = `/folder/folder_page/${folder.id}`;
+    card.style.backgroundColor = folder.color;
+    card.style.position = 'relative';
+    card.innerHTML = `
+        ${folder.password_check ? '<div class="lock-icon">🔒</div>' : ''}
+        <div class="folder-icon">📁</div>
+        <h3></h3>
+        <p></p>
+    `;
+    card.querySelector('h3').textContent = folder.name;
+    card.querySelector('p').textContent = `Обновлено: ${formatDate(folder.updated_at)}`;
+    return card;
+}
+
+function renderNoteCard(note) {
+    const card = document.createElement('div');
+    card.className = 'note-card';
+    card.dataset.noteId = note.id;
+    card.innerHTML = '<h3></h3><p></p>';
+    card.querySelector('h3').textContent = note.name;
+    card.querySelector('p').textContent = `Последнее изменение: ${formatDate(note.updated_at)}`;
+    return card;
+}
+
+// ========================
+// ОБНОВЛЕНИЯ В РЕАЛЬНОМ ВРЕМЕНИ
+// ========================
+
+// Сколько id заметок читается одним запросом /note/summary/
+const LIVE_SUMMARY_CHUNK = 100;
+
+/**
+ * Карточки заметок без текста, пачками по LIVE_SUMMARY_CHUNK
+ * @param {number[]} ids - id заметок
+ * @returns {Promise<object[]>} найденные заметки; удалённых среди них нет
+ */
+async function loadNoteSummaries(ids) {
+    const items = [];
+    for (let i = 0; i < ids.length; i += LIVE_SUMMARY_CHUNK) {
+        const params = new URLSearchParams();
+        ids.slice(i, i + LIVE_SUMMARY_CHUNK).forEach(id => params.append('ids', id));
+        const response = await fetch(`/note/summary/?${params}`, { headers: { 'Accept': 'application/json' } });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        items.push(...await response.json());
+    }
+    return items;
+}
+
+/**
+ * Папки по одной: они без тел и меняются редко
+ * @param {number[]} ids - id папок
+ * @returns {Promise<object[]>} найденные папки
+ */
+async function loadFolders(ids) {
+    const responses = await Promise.all(ids.map(id =>
+        fetch(`/folder/${id}/`, { headers: { 'Accept': 'application/json' } })
+    ));
+    const items = [];
+    for (const response of responses) {
+        if (response.ok) items.push(await response.json());
+        else if (response.status !== 404) throw new Error(`HTTP ${response.status}`);
+    }
+    return items;
+}
+
+const LIVE_TARGETS = {
+    folder: { containerId: 'foldersScroll', load: loadFolders, render: renderFolderCard },
+    note: { containerId: 'notesScroll', load: loadNoteSummaries, render: renderNoteCard },
+};
+
+/**
+ * Заменяет карточку объекта на свежую или добавляет её в начало списка
+ * @param {string} entity - note или folder
+ * @param {object} item - объект из API
+ */
+function upsertCard(entity, item) {
+    const target = LIVE_TARGETS[entity];
+    const container = target && document.getElementById(target.containerId);
+    if (!container) return;
+
+    const card = target.render(item);
+    const existing = container.querySelector(`[data-${entity}-id="${item.id}"]`);
+    if (existing) {
+        existing.replaceWith(card);
+    } else {
+        container.prepend(card);
+    }
+}
+
+/**
+ * Убирает карточку объекта, если она есть на странице
+ * @param {string} entity - note или folder
+ * @param {number} id - id объекта
+ */
+function removeCard(entity, id) {
+    const target = LIVE_TARGETS[entity];
+    const container = target && document.getElementById(target.containerId);
+    const card = container && container.querySelector(`[data-${entity}-id="${id}"]`);
+    if (card) card.remove();
+}
+
+/**
+ * Подписка на /events/ (Server-Sent Events): изменённые карточки
+ * перечитываются одним запросом на событие (для заметок - без текста),
+ * удалённые убираются. Если изменений слишком много (ids = null или
+ * resync), страница перезагружается целиком
+ */
+function setupLiveUpdates() {
+    if (!window.EventSource) return;
+    if (!document.getElementById('foldersScroll') && !document.getElementById('notesScroll')) return;
+
+    const source = new EventSource('/events/');
+
+    source.addEventListener('change', async (e) => {
+        const message = JSON.parse(e.data);
+        const target = LIVE_TARGETS[message.entity];
+
+        if (message.op === 'resync' || message.ids === null) {
+            location.reload();
+            return;
+        }
+        if (!target) return;
+
+        if (message.op === 'deleted') {
+            message.ids.forEach(id => removeCard(message.entity, id));
+            return;
+        }
+        if (!document.getElementById(target.containerId) || !message.ids.length) return;
+
+        try {
+            const items = await target.load(message.ids);
+            const found = new Set(items.map(item => item.id));
+            items.forEach(item => upsertCard(message.entity, item));
+            // Не найденные успели удалить
+            message.ids.filter(id => !found.has(id)).forEach(id => removeCard(message.entity, id));
+        } catch (err) {
+            console.error('Ошибка при обновлении карточек:', err);
+        }
+    });
+}
+
 // ========================
 // ОСНОВНЫЕ ФУНКЦИИ
 // ========================
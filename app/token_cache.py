@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class TokenCache:
+    """
+    LRU-кэш уже проверенных JWT: токен -> payload.
+    Запись живёт до exp токена, после чего токен снова проходит полную
+    проверку (и получает ExpiredSignatureError).
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def get(self, token: str) -> Optional[dict]:
+        item = self._items.get(token)
+        if item is None:
+            self.misses += 1
+            return None
+
+        payload, expires_at = item
+        if expires_at <= time.time():
+            del self._items[token]
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(token)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: dict):
+        exp = payload.get("exp")
+        if self.maxsize <= 0 or exp is None:
+            return
+
+        self._items[token] = (payload, exp)
+        self._items.move_to_end(token)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._items),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
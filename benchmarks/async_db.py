@@ -0,0 +1,131 @@
+"""
+Сравнение синхронной и асинхронной сессии под конкурентной нагрузкой.
+
+Часть запросов выполняет медленный SQL (эмулируется функцией slow() в SQLite),
+остальные - быстрые выборки по id. Для каждого пути считается p50/p99 быстрых
+запросов: в синхронном варианте медленный запрос блокирует event loop.
+
+    python -m benchmarks.async_db --requests 400 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Annotated
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import Base, Note, User
+from benchmarks.common import percentile
+
+
+def _register_slow(dbapi_connection, connection_record):
+    dbapi_connection.create_function("slow", 1, lambda ms: time.sleep(ms / 1000) or 1)
+
+
+def build_app(path: str, pool_size: int) -> FastAPI:
+    # Пул не меньше числа конкурентных запросов, иначе синхронный путь
+    # упирается в pool timeout, а не в блокировку event loop
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}, pool_size=pool_size
+    )
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", pool_size=pool_size)
+    event.listen(engine, "connect", _register_slow)
+    event.listen(async_engine.sync_engine, "connect", _register_slow)
+
+    SyncSession = sessionmaker(bind=engine, autoflush=False)
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    def get_sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync/{note_id}")
+    async def sync_note(note_id: int, ms: int, db: Annotated[Session, Depends(get_sync_db)]):
+        db.execute(text("SELECT slow(:ms)"), {"ms": ms})
+        return db.scalar(select(Note.name).where(Note.id == note_id))
+
+    @app.get("/async/{note_id}")
+    async def async_note(note_id: int, ms: int, db: Annotated[AsyncSession, Depends(get_async_db)]):
+        await db.execute(text("SELECT slow(:ms)"), {"ms": ms})
+        return await db.scalar(select(Note.name).where(Note.id == note_id))
+
+    app.state.engines = (engine, async_engine)
+    return app
+
+
+def seed(path: str, notes: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, login="bench", hash_password=""))
+        db.add_all(Note(owner_id=1, slug=f"bench_{i}", name=f"note {i}", text="x" * 200) for i in range(notes))
+        db.commit()
+    engine.dispose()
+
+
+async def run_path(app: FastAPI, prefix: str, requests: int, concurrency: int, slow_every: int, slow_ms: int):
+    sem = asyncio.Semaphore(concurrency)
+    fast_latencies = []
+
+    async def one(client, i):
+        is_slow = i % slow_every == 0
+        async with sem:
+            start = time.perf_counter()
+            r = await client.get(f"/{prefix}/{i % 100 + 1}", params={"ms": slow_ms if is_slow else 0})
+            r.raise_for_status()
+            if not is_slow:
+                fast_latencies.append((time.perf_counter() - start) * 1000)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "rps": round(requests / elapsed, 1),
+        "fast_p50_ms": round(statistics.median(fast_latencies), 2),
+        "fast_p99_ms": round(percentile(fast_latencies, 99), 2),
+    }
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, 100)
+        app = build_app(path, args.concurrency)
+        result = {}
+        for prefix in ("sync", "async"):
+            result[prefix] = await run_path(
+                app, prefix, args.requests, args.concurrency, args.slow_every, args.slow_ms
+            )
+        engine, async_engine = app.state.engines
+        engine.dispose()
+        await async_engine.dispose()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--slow-every", type=int, default=10)
+    parser.add_argument("--slow-ms", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
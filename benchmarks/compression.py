@@ -0,0 +1,135 @@
+"""
+Сжатие тел заметок (CompressedText): размер базы и задержки записи/чтения.
+
+Одна и та же выборка заметок - крупные логи и markdown вперемешку с
+короткими - пишется в две SQLite-базы: без сжатия (порог выше любого тела)
+и с текущим NOTE_COMPRESS_THRESHOLD.
+
+    python -m benchmarks.compression --notes 20000 --reads 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import services
+from app.config import Config
+from app.models import Base, Note, User
+from benchmarks.common import summarize
+
+LEVELS = ["INFO", "INFO", "INFO", "WARN", "ERROR"]
+
+
+def make_log(rnd: random.Random, lines: int) -> str:
+    return "".join(
+        f"2026-10-18T{rnd.randint(0, 23):02}:{rnd.randint(0, 59):02}:{rnd.randint(0, 59):02} "
+        f"{rnd.choice(LEVELS)} worker-{rnd.randint(1, 16)} request_id={rnd.getrandbits(64):016x} "
+        f"handled /note/{rnd.randint(1, 10 ** 6)}/ in {rnd.random() * 100:.2f} ms\n"
+        for _ in range(lines)
+    )
+
+
+def make_markdown(rnd: random.Random, sections: int) -> str:
+    words = ["заметка", "папка", "сервер", "индекс", "запрос", "кэш", "пользователь", "миграция"]
+    return "".join(
+        f"## Раздел {i}\n\n" + " ".join(rnd.choices(words, k=rnd.randint(40, 120))) + "\n\n- пункт\n- пункт\n\n"
+        for i in range(sections)
+    )
+
+
+def make_bodies(notes: int, rnd: random.Random):
+    bodies = []
+    for _ in range(notes):
+        kind = rnd.random()
+        if kind < 0.3:
+            bodies.append(make_log(rnd, rnd.randint(50, 500)))
+        elif kind < 0.6:
+            bodies.append(make_markdown(rnd, rnd.randint(3, 30)))
+        else:
+            bodies.append("короткая заметка " * rnd.randint(1, 20))
+    return bodies
+
+
+async def measure(url: str, bodies, reads: int, batch: int, rnd: random.Random):
+    engine = create_async_engine(url)
+    writes, point_reads, summaries = [], [], []
+    now = datetime.utcnow()
+
+    async with AsyncSession(engine) as db:
+        for start in range(0, len(bodies), batch):
+            rows = [
+                {"owner_id": 1, "slug": f"bench_{i}", "name": f"note {i}", "text": body,
+                 "created_at": now, "updated_at": now}
+                for i, body in enumerate(bodies[start:start + batch], start)
+            ]
+            began = time.perf_counter()
+            await db.execute(insert(Note), rows)
+            await db.commit()
+            # Задержка записи в пересчёте на одну заметку
+            writes.append((time.perf_counter() - began) * 1000 / len(rows))
+
+        for _ in range(reads):
+            began = time.perf_counter()
+            await services.get_note(db, rnd.randint(1, len(bodies)))
+            point_reads.append((time.perf_counter() - began) * 1000)
+            db.expunge_all()
+
+        for _ in range(max(1, reads // 20)):
+            began = time.perf_counter()
+            await services.get_notes_by_user(db, 1, None, Config.PAGE_SIZE, "summary")
+            summaries.append((time.perf_counter() - began) * 1000)
+
+    await engine.dispose()
+    return {
+        "write_per_note": summarize(writes),
+        "get_note": summarize(point_reads),
+        "summary_page": summarize(summaries),
+    }
+
+
+def run(path: str, bodies, args, threshold: int):
+    Config.NOTE_COMPRESS_THRESHOLD = threshold
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "login": "bench", "hash_password": ""}])
+    engine.dispose()
+
+    result = asyncio.run(measure(f"sqlite+aiosqlite:///{path}", bodies, args.reads, args.batch,
+                                 random.Random(args.seed)))
+    result["db_size_mb"] = round(os.path.getsize(path) / 2 ** 20, 2)
+    return result
+
+
+def main(args):
+    rnd = random.Random(args.seed)
+    bodies = make_bodies(args.notes, rnd)
+    threshold = Config.NOTE_COMPRESS_THRESHOLD
+
+    with tempfile.TemporaryDirectory() as tmp:
+        result = {
+            "notes": args.notes,
+            "text_mb": round(sum(len(body.encode()) for body in bodies) / 2 ** 20, 2),
+            "threshold": threshold,
+            "plain": run(os.path.join(tmp, "plain.db"), bodies, args, 2 ** 62),
+            "compressed": run(os.path.join(tmp, "compressed.db"), bodies, args, threshold),
+        }
+    result["size_ratio"] = round(result["plain"]["db_size_mb"] / result["compressed"]["db_size_mb"], 2)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=20_000)
+    parser.add_argument("--reads", type=int, default=2_000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
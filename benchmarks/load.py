@@ -0,0 +1,256 @@
+"""
+Нагрузочные сценарии против всего приложения (app.main) в процессе, через
+httpx.ASGITransport: без сервера и внешних сервисов, только SQLite.
+
+Каждый виртуальный пользователь - свой клиент с куками засеянного
+пользователя (benchmarks.seed). Сценарий выполняется --requests раз
+силами --concurrency пользователей; на выходе JSON с пропускной
+способностью сценария, p50/p95/p99 каждого запроса и числом SQL-запросов
+на операцию (из app.metrics). login упирается в bcrypt (BCRYPT_ROUNDS,
+HASH_WORKERS) и на порядки медленнее остальных.
+
+    python -m benchmarks.load                       # засеять временную БД и прогнать всё
+    python -m benchmarks.load --db /tmp/bench.db --scenarios dashboard note_crud
+    python -m benchmarks.load --output after.json --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.common import summarize
+from benchmarks.seed import PASSWORD, seed, use_database
+
+
+class VirtualUser:
+    def __init__(self, client, user_id: int, folder_ids, note_ids, rnd: random.Random):
+        self.client = client
+        self.user_id = user_id
+        self.login = f"bench_{user_id}"
+        self.folder_ids = folder_ids
+        self.note_ids = note_ids
+        self.rnd = rnd
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        began = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies[name].append((time.perf_counter() - began) * 1000)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+
+async def login(user: VirtualUser):
+    await user.request("POST /auth/token", "POST", "/auth/token",
+                       data={"username": user.login, "password": PASSWORD})
+
+
+async def dashboard(user: VirtualUser):
+    await user.request("GET /", "GET", "/")
+
+
+async def folder_page(user: VirtualUser):
+    folder_id = user.rnd.choice(user.folder_ids)
+    await user.request("GET /folder/folder_page/{id}", "GET", f"/folder/folder_page/{folder_id}")
+
+
+async def note_crud(user: VirtualUser):
+    response = await user.request("POST /note/", "POST", "/note/", json={
+        "name": "load", "text": "нагрузочная заметка " * user.rnd.randint(10, 200),
+        "folder_id": user.rnd.choice(user.folder_ids),
+    })
+    if response.status_code >= 400:
+        return
+    note_id = response.json()["id"]
+    await user.request("GET /note/{id}/", "GET", f"/note/{note_id}/")
+    await user.request("PUT /note/{id}/", "PUT", f"/note/{note_id}/", json={"name": "load 2", "text": "правка"})
+    await user.request("DELETE /note/{id}/", "DELETE", f"/note/{note_id}/")
+
+
+async def mass_move(user: VirtualUser):
+    note_ids = user.rnd.sample(user.note_ids, min(20, len(user.note_ids)))
+    await user.request("PATCH /note/mass_move/", "PATCH", "/note/mass_move/", json={
+        "note_ids": note_ids, "folder_id": user.rnd.choice(user.folder_ids),
+    })
+
+
+SCENARIOS = {
+    "login": login,
+    "dashboard": dashboard,
+    "folder_page": folder_page,
+    "note_crud": note_crud,
+    "mass_move": mass_move,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def make_users(app, count: int, rnd: random.Random):
+    import httpx
+    from sqlalchemy import select
+
+    from app.database import AsyncSessionLocal
+    from app.models import Folder, Note, User
+
+    async with AsyncSessionLocal() as db:
+        user_ids = (await db.scalars(select(User.id).order_by(User.id).limit(count))).all()
+        folders, notes = defaultdict(list), defaultdict(list)
+        for owner_id, folder_id in await db.execute(select(Folder.owner_id, Folder.id).where(Folder.owner_id.in_(user_ids))):
+            folders[owner_id].append(folder_id)
+        for owner_id, note_id in await db.execute(select(Note.owner_id, Note.id).where(Note.owner_id.in_(user_ids))):
+            notes[owner_id].append(note_id)
+
+    users = []
+    for user_id in user_ids:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="https://bench")
+        user = VirtualUser(client, user_id, folders[user_id], notes[user_id], random.Random(rnd.random()))
+        await login(user)
+        user.latencies.clear()
+        user.errors.clear()
+        users.append(user)
+    return users
+
+
+def _query_count():
+    from app import metrics
+    return sum(metrics.db_queries.values.values())
+
+
+async def run_scenario(name: str, users, requests: int):
+    scenario = SCENARIOS[name]
+    for user in users:
+        user.latencies.clear()
+        user.errors.clear()
+
+    remaining = iter(range(requests))
+
+    async def worker(user: VirtualUser):
+        for _ in remaining:
+            await scenario(user)
+
+    queries = _query_count()
+    began = time.perf_counter()
+    await asyncio.gather(*(worker(user) for user in users))
+    elapsed = time.perf_counter() - began
+    queries = _query_count() - queries
+
+    latencies, errors = defaultdict(list), defaultdict(int)
+    for user in users:
+        for request, values in user.latencies.items():
+            latencies[request] += values
+        for request, count in user.errors.items():
+            errors[request] += count
+
+    return {
+        "operations": requests,
+        "seconds": round(elapsed, 3),
+        "ops_per_s": round(requests / elapsed, 1),
+        "queries_per_op": round(queries / requests, 1),
+        "requests": {
+            request: {**summarize(values), "errors": errors[request]}
+            for request, values in sorted(latencies.items())
+        },
+    }
+
+
+def compare(result: dict, baseline: dict):
+    """Изменение относительно прошлого прогона, в процентах (минус - быстрее)"""
+    diff = {}
+    for name, scenario in result["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        diff[name] = {"ops_per_s": _percent(scenario["ops_per_s"], before["ops_per_s"])}
+        for request, stats in scenario["requests"].items():
+            old = before["requests"].get(request)
+            if old:
+                diff[name][request] = {
+                    key: _percent(stats[key], old[key]) for key in ("p50_ms", "p95_ms", "p99_ms")
+                }
+    return diff
+
+
+def _percent(new, old):
+    return round((new - old) / old * 100, 1) if old else None
+
+
+async def run(args, dataset):
+    from app.database import dispose_engines
+    from app.main import app
+
+    rnd = random.Random(args.seed)
+    users = await make_users(app, args.concurrency, rnd)
+    try:
+        # Прогрев: первые запросы платят за импорт шаблонов и пул соединений
+        for user in users:
+            await dashboard(user)
+
+        scenarios = {name: await run_scenario(name, users, args.requests) for name in args.scenarios}
+    finally:
+        for user in users:
+            await user.client.aclose()
+        await dispose_engines()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "concurrency": len(users),
+            "requests": args.requests,
+            "seed": args.seed,
+            "dataset": dataset,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            use_database(args.db)
+            dataset = {"db": args.db}
+        else:
+            path = os.path.join(tmp, "load.db")
+            dataset = seed(path, args.users, args.folders, args.notes, args.seed)
+
+        result = asyncio.run(run(args, dataset))
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            result["diff"] = compare(result, json.load(baseline))
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", help="уже засеянная БД (benchmarks.seed); по умолчанию - временная")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--folders", type=int, default=10)
+    parser.add_argument("--notes", type=int, default=200)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    main(parser.parse_args())
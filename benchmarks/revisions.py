@@ -0,0 +1,123 @@
+"""
+История заметок (note_revisions): рост хранилища и задержка восстановления.
+
+Одна заметка правится --revisions раз мелкими правками (вставка фразы,
+удаление куска, замена абзаца) при разных интервалах полных снимков.
+Объём истории сравнивается с полной копией текста на каждую версию -
+как есть и сжатой zlib.
+
+    python -m benchmarks.revisions --revisions 1500 --snapshot-every 10 50 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import zlib
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import services
+from app.config import Config
+from app.models import Base, Note, NoteRevision, User
+from benchmarks.common import summarize
+from benchmarks.compression import make_markdown
+
+
+def edit(text: str, rnd: random.Random) -> str:
+    kind = rnd.random()
+    position = rnd.randint(0, len(text))
+    if kind < 0.7:
+        return text[:position] + f" правка {rnd.getrandbits(32):08x}" + text[position:]
+    if kind < 0.9:
+        return text[:position] + text[position + rnd.randint(1, 200):]
+    start = text.rfind("\n\n", 0, position) + 1
+    end = text.find("\n\n", position)
+    end = len(text) if end == -1 else end
+    return text[:start] + make_markdown(rnd, 1) + text[end:]
+
+
+async def measure(url: str, args, every: int):
+    Config.NOTE_REVISION_SNAPSHOT_EVERY = every
+    rnd = random.Random(args.seed)
+    engine = create_async_engine(url)
+    saves, reads, worst = [], [], []
+    full_bytes = full_compressed_bytes = 0
+
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        note = Note(owner_id=1, slug="bench", name="bench", text=make_markdown(rnd, args.sections))
+        db.add(note)
+        await db.commit()
+
+        for _ in range(args.revisions):
+            previous = note.text.encode()
+            full_bytes += len(previous)
+            full_compressed_bytes += len(zlib.compress(previous, Config.NOTE_COMPRESS_LEVEL))
+
+            note.text = edit(note.text, rnd)
+            began = time.perf_counter()
+            await db.commit()
+            saves.append((time.perf_counter() - began) * 1000)
+
+        stored = (await db.execute(
+            select(func.sum(func.length(NoteRevision.data)), func.count())
+            .where(NoteRevision.kind == "snapshot")
+        )).one()
+        total = await db.scalar(select(func.sum(func.length(NoteRevision.data))))
+
+        for _ in range(args.reads):
+            version = rnd.randint(1, note.version)
+            began = time.perf_counter()
+            await services.get_revision(db, 1, note.id, version)
+            reads.append((time.perf_counter() - began) * 1000)
+
+        # Худший случай: версия сразу над снимком, до следующего - every - 1 разниц
+        for version in range(1, note.version - every, every):
+            began = time.perf_counter()
+            await services.get_revision(db, 1, note.id, version)
+            worst.append((time.perf_counter() - began) * 1000)
+
+    await engine.dispose()
+    return {
+        "snapshot_every": every,
+        "text_kb": round(len(note.text.encode()) / 1024, 1),
+        "history_kb": round(total / 1024, 1),
+        "snapshots": stored[1],
+        "snapshots_kb": round((stored[0] or 0) / 1024, 1),
+        "full_copies_kb": round(full_bytes / 1024, 1),
+        "full_copies_zlib_kb": round(full_compressed_bytes / 1024, 1),
+        "save": summarize(saves),
+        "reconstruct_random": summarize(reads),
+        "reconstruct_worst": summarize(worst or reads),
+    }
+
+
+def run(path: str, args, every: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "login": "bench", "hash_password": ""}])
+    engine.dispose()
+    return asyncio.run(measure(f"sqlite+aiosqlite:///{path}", args, every))
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [
+            run(os.path.join(tmp, f"revisions_{every}.db"), args, every)
+            for every in args.snapshot_every
+        ]
+    print(json.dumps({"revisions": args.revisions, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--revisions", type=int, default=1500)
+    parser.add_argument("--sections", type=int, default=40)
+    parser.add_argument("--reads", type=int, default=300)
+    parser.add_argument("--snapshot-every", type=int, nargs="+", default=[10, Config.NOTE_REVISION_SNAPSHOT_EVERY, 200])
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
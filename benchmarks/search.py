@@ -0,0 +1,117 @@
+"""
+Полнотекстовый поиск на синтетическом корпусе.
+
+Генерирует --notes заметок (по умолчанию 1M) с текстом из словаря с
+распределением Ципфа, затем сравнивает services.search_notes с наивным
+LIKE '%слово%' по тем же словам.
+
+    python -m benchmarks.search --notes 1000000 --queries 200
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import services
+from app.models import Base, Note, User
+from benchmarks.common import summarize
+
+BATCH = 10_000
+
+
+def make_vocabulary(size: int, rnd: random.Random):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rnd.choices(letters, k=rnd.randint(3, 10))) for _ in range(size)]
+
+
+def seed(url: str, notes: int, users: int, vocabulary, rnd: random.Random):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": i, "login": f"user{i}", "hash_password": ""} for i in range(1, users + 1)])
+
+    for start in range(0, notes, BATCH):
+        rows = []
+        for i in range(start, min(start + BATCH, notes)):
+            words = rnd.choices(vocabulary, cum_weights=cum_weights, k=rnd.randint(20, 300))
+            rows.append({
+                "owner_id": i % users + 1,
+                "slug": f"bench_{i}",
+                "name": " ".join(words[:4]),
+                "text": " ".join(words),
+                "created_at": now,
+                "updated_at": now,
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(Note), rows)
+
+    engine.dispose()
+
+
+async def measure(url: str, words, users: int, limit: int, like_queries: int):
+    engine = create_async_engine(url)
+    fts, like = [], []
+    async with AsyncSession(engine) as db:
+        for i, word in enumerate(words):
+            owner_id = i % users + 1
+
+            start = time.perf_counter()
+            await services.search_notes(db, owner_id, word, limit)
+            fts.append((time.perf_counter() - start) * 1000)
+
+            if i < like_queries:
+                start = time.perf_counter()
+                query = (select(Note.id, Note.name)
+                         .where(Note.owner_id == owner_id, func.note_text(Note.text).like(f"%{word}%"))
+                         .limit(limit))
+                (await db.execute(query)).all()
+                like.append((time.perf_counter() - start) * 1000)
+
+    await engine.dispose()
+    return {"fts": summarize(fts), "like": summarize(like)}
+
+
+def main(args):
+    rnd = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rnd)
+    # Слова из разных частей распределения: частые, средние и редкие
+    words = [vocabulary[int(len(vocabulary) * rnd.random() ** 3)] for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search.db")
+        start = time.perf_counter()
+        seed(f"sqlite:///{path}", args.notes, args.users, vocabulary, rnd)
+        seed_seconds = time.perf_counter() - start
+
+        result = asyncio.run(measure(f"sqlite+aiosqlite:///{path}", words, args.users, args.limit, args.like_queries))
+        result.update({
+            "notes": args.notes,
+            "users": args.users,
+            "seed_seconds": round(seed_seconds, 1),
+            "db_size_mb": round(os.path.getsize(path) / 2 ** 20, 1),
+        })
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--like-queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
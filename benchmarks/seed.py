@@ -0,0 +1,131 @@
+"""
+Синтетические данные для нагрузочных прогонов: N пользователей x M папок
+x K заметок. Размеры тел - логнормальные (медиана около 1 KB, хвост до
+--max-text-kb), вперемешку markdown и логи. Всё детерминировано --seed.
+
+У всех пользователей логин bench_<i> и пароль PASSWORD.
+
+    python -m benchmarks.seed --db /tmp/bench.db --users 20 --folders 10 --notes 200
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+PASSWORD = "bench-password"
+COLORS = ["#f28b82", "#fbbc04", "#fff475", "#ccff90", "#a7ffeb", "#cbf0f8", "#aecbfa", "#d7aefb"]
+BATCH = 1000
+
+
+def use_database(path: str):
+    # app.database создаёт движки из DB_URL при импорте - выставляем до него
+    os.environ["DB_URL"] = f"sqlite:///{os.path.abspath(path)}"
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key-bench-secret-key")
+    os.environ.setdefault("ALGORITHM", "HS256")
+
+
+def make_text(rnd: random.Random, max_chars: int) -> str:
+    from benchmarks.compression import make_log, make_markdown
+
+    size = min(max_chars, int(rnd.lognormvariate(7, 1.2)))
+    if rnd.random() < 0.3:
+        text = make_log(rnd, size // 100 + 1)
+    else:
+        text = make_markdown(rnd, size // 500 + 1)
+    return text[:size]
+
+
+def seed(path: str, users: int, folders: int, notes: int, seed_value: int = 42, max_text_kb: int = 200):
+    use_database(path)
+    from passlib.context import CryptContext
+    from sqlalchemy import create_engine, insert
+
+    from app.config import Config
+    from app.models import Base, EntityVersion, Folder, Note, User
+    from app.services.sync import changes_key
+    from app.slugs import folder_slug, note_slug
+
+    rnd = random.Random(seed_value)
+    started = time.perf_counter()
+    engine = create_engine(f"sqlite:///{os.path.abspath(path)}")
+    Base.metadata.create_all(engine)
+
+    # Один хеш на всех: bcrypt на каждого пользователя занял бы минуты
+    hash_password = CryptContext(schemes=["bcrypt"], bcrypt__rounds=Config.BCRYPT_ROUNDS).hash(PASSWORD)
+    now = datetime.utcnow()
+    text_bytes = 0
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": user_id, "login": f"bench_{user_id}", "hash_password": hash_password}
+            for user_id in range(1, users + 1)
+        ])
+        # Как после миграции 0007: у каждой строки свой номер в
+        # последовательности владельца, сначала папки, затем заметки
+        seqs = {user_id: 0 for user_id in range(1, users + 1)}
+
+        def next_seq(user_id):
+            seqs[user_id] += 1
+            return seqs[user_id]
+
+        folder_rows = []
+        for user_id in range(1, users + 1):
+            for index in range(folders):
+                created = now - timedelta(days=rnd.uniform(0, 365))
+                folder_rows.append({
+                    "id": len(folder_rows) + 1, "owner_id": user_id, "slug": folder_slug(),
+                    "name": f"Папка {index}", "color": rnd.choice(COLORS),
+                    "created_at": created, "updated_at": created, "change_seq": next_seq(user_id),
+                })
+        conn.execute(insert(Folder), folder_rows)
+
+        batch = []
+        for user_id in range(1, users + 1):
+            user_folders = [row["id"] for row in folder_rows if row["owner_id"] == user_id]
+            for index in range(notes):
+                text = make_text(rnd, max_text_kb * 1024)
+                text_bytes += len(text.encode())
+                created = now - timedelta(days=rnd.uniform(0, 365))
+                batch.append({
+                    "owner_id": user_id, "slug": note_slug(), "name": f"Заметка {index}",
+                    # Каждая пятая заметка - вне папок
+                    "folder_id": rnd.choice(user_folders) if user_folders and rnd.random() > 0.2 else None,
+                    "text": text, "created_at": created,
+                    "updated_at": created + timedelta(days=rnd.uniform(0, 30)),
+                    "change_seq": next_seq(user_id),
+                })
+                if len(batch) >= BATCH:
+                    conn.execute(insert(Note), batch)
+                    batch = []
+        if batch:
+            conn.execute(insert(Note), batch)
+
+        conn.execute(insert(EntityVersion), [
+            {"key": changes_key(user_id), "version": seq} for user_id, seq in seqs.items()
+        ])
+
+    engine.dispose()
+    return {
+        "users": users,
+        "folders": users * folders,
+        "notes": users * notes,
+        "text_mb": round(text_bytes / 2 ** 20, 2),
+        "db_mb": round(os.path.getsize(path) / 2 ** 20, 2),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--folders", type=int, default=10)
+    parser.add_argument("--notes", type=int, default=200)
+    parser.add_argument("--max-text-kb", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if os.path.exists(args.db):
+        parser.error(f"{args.db} уже существует")
+    print(json.dumps(seed(args.db, args.users, args.folders, args.notes, args.seed, args.max_text_kb), indent=2))
@@ -0,0 +1,78 @@
+"""
+Сериализация ответа списка из 10k заметок тремя способами:
+
+- orm_jsonable: ORM-объекты через jsonable_encoder + JSONResponse (старый путь)
+- pydantic: ORM-объекты через TypeAdapter(List[NoteOut]) (response_model)
+- rows_orjson: строки-словари из выборки колонок сразу в ORJSONResponse
+
+    python -m benchmarks.serialization --rows 10000 --repeat 20
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import Base, Note, User
+from app.schemas import NoteOut
+from app.services.notes import NOTE_COLUMNS
+from benchmarks.common import summarize
+
+
+def load(rows: int, text_size: int):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "login": "bench", "hash_password": ""}])
+        conn.execute(insert(Note), [
+            {"owner_id": 1, "slug": f"bench_{i}", "name": f"note {i}", "text": "x" * text_size,
+             "created_at": now, "updated_at": now}
+            for i in range(rows)
+        ])
+
+    with Session(engine) as db:
+        orm = db.scalars(select(Note)).all()
+        db.expunge_all()
+        mappings = [dict(row) for row in db.execute(select(*NOTE_COLUMNS)).mappings()]
+    engine.dispose()
+    return orm, mappings
+
+
+def timed(func, repeat: int):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return summarize(latencies)
+
+
+def main(args):
+    orm, mappings = load(args.rows, args.text_size)
+    adapter = TypeAdapter(List[NoteOut])
+
+    result = {
+        "orm_jsonable": timed(lambda: JSONResponse({"items": jsonable_encoder(orm)}), args.repeat),
+        "pydantic": timed(
+            lambda: ORJSONResponse({"items": adapter.dump_python(adapter.validate_python(orm, from_attributes=True))}),
+            args.repeat,
+        ),
+        "rows_orjson": timed(lambda: ORJSONResponse({"items": mappings}), args.repeat),
+    }
+    result["rows"] = args.rows
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--text-size", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,72 @@
+"""
+Пропускная способность запросов с JWT в куках с кэшем проверенных
+токенов и без него (TokenCache(0) - каждый decode проверяет подпись).
+
+Каждый запрос проходит auto_refresh_token и get_user_by_token, то есть
+декодирует токен минимум дважды, как главная страница.
+
+    python -m benchmarks.token_cache --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+import httpx
+from fastapi import FastAPI, Request
+
+from app.config import Config
+from app.routers import auth
+from app.token_cache import TokenCache
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.middleware("http")(auth.auto_refresh_token)
+
+    @app.get("/whoami")
+    async def whoami(request: Request):
+        return auth.get_user_by_token(request.cookies["access_token"])
+
+    return app
+
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> float:
+    cookies = {
+        # Токен живёт дольше TOKEN_MIN_EXEPT, поэтому middleware его не перевыпускает
+        "access_token": auth.create_access_token("bench", 1, timedelta(hours=1)),
+        "refresh_token": auth.create_refresh_token("bench", 1, timedelta(days=1)),
+    }
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(client):
+        async with sem:
+            (await client.get("/whoami")).raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="https://bench", cookies=cookies) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client) for _ in range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+async def main(args):
+    app = build_app()
+    original = auth.token_cache
+    result = {}
+    try:
+        for name, cache in (("uncached", TokenCache(0)), ("cached", TokenCache(Config.TOKEN_CACHE_SIZE))):
+            auth.token_cache = cache
+            rps = await run(app, args.requests, args.concurrency)
+            result[name] = {"rps": round(rps, 1), **cache.stats()}
+    finally:
+        auth.token_cache = original
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+import pytest
+
+# app.database создаёт движки из DB_URL при импорте - выставляем до него
+os.environ.setdefault("DB_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'notes_tests.db')}")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-test-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.database import Base, engine
+    from app.main import app
+
+    Base.metadata.create_all(engine)
+    with TestClient(app, base_url="https://testserver") as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def logged_in(client):
+    """client с кукой access_token пользователя tester"""
+    client.post("/auth/register", data={"login": "tester", "password": "secret", "confirm_password": "secret"})
+    response = client.post("/auth/token", data={"username": "tester", "password": "secret"})
+    assert response.status_code == 200, response.text
+    return client
@@ -0,0 +1,44 @@
+import asyncio
+import random
+import time
+
+from app.services import iter_lines
+
+
+async def _chunks(data: bytes, sizes):
+    position = 0
+    for size in sizes:
+        yield data[position:position + size]
+        position += size
+
+
+def _lines(data: bytes, sizes, max_line_bytes: int):
+    async def collect():
+        return [line async for line in iter_lines(_chunks(data, sizes), max_line_bytes)]
+    return asyncio.run(collect())
+
+
+def _expected(data: bytes, max_line_bytes: int):
+    lines = data.split(b"\n")
+    if lines[-1] == b"":
+        lines.pop()
+    return [None if len(line) > max_line_bytes else line for line in lines]
+
+
+def test_lines_do_not_depend_on_chunking():
+    rnd = random.Random(1)
+    data = b"\n".join(bytes(rnd.choice(b"ab") for _ in range(rnd.randint(0, 40))) for _ in range(200))
+    for _ in range(20):
+        sizes = []
+        while sum(sizes) < len(data):
+            sizes.append(rnd.randint(1, 64))
+        assert _lines(data, sizes, max_line_bytes=30) == _expected(data, max_line_bytes=30)
+
+
+def test_long_line_in_small_chunks_is_linear():
+    # 4 МБ одной строкой кусками по 1 КБ: склейка bytes копировала бы ~8 ГБ
+    data = b"x" * (4 * 1024 * 1024) + b"\nshort\n"
+    started = time.perf_counter()
+    lines = _lines(data, [1024] * (len(data) // 1024 + 1), max_line_bytes=len(data))
+    assert lines == [data[:-7], b"short"]
+    assert time.perf_counter() - started < 1
@@ -0,0 +1,30 @@
+import json
+
+from app import query_log
+from app.config import Config
+
+
+def test_only_single_row_repeats_are_reported():
+    stats = query_log.RequestQueries()
+    token = query_log._current.set(stats)
+    try:
+        for _ in range(Config.N_PLUS_ONE_THRESHOLD):
+            query_log.record("INSERT INTO notes", [], 0.001, executemany=True)
+            with query_log.batched():
+                query_log.record("UPDATE notes", [], 0.001)
+            query_log.record("SELECT notes", [], 0.001)
+    finally:
+        query_log._current.reset(token)
+
+    assert stats.count == 3 * Config.N_PLUS_ONE_THRESHOLD
+    assert stats.repeated() == [("SELECT notes", Config.N_PLUS_ONE_THRESHOLD)]
+
+
+def test_batched_import_is_not_n_plus_one(logged_in, monkeypatch):
+    monkeypatch.setattr(Config, "QUERY_DEBUG_HEADERS", True)
+    lines = [json.dumps({"name": f"n{i}", "text": "t"}) for i in range(2 * Config.N_PLUS_ONE_THRESHOLD)]
+
+    response = logged_in.post("/note/import", params={"batch_size": 1}, content="\n".join(lines))
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == len(lines)
+    assert response.headers["x-db-repeated"] == "0"
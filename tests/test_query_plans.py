@@ -0,0 +1,170 @@
+"""
+Запросы сервисного слоя идут по индексам: в плане нет полного прохода по
+таблице и сортировки во временном B-дереве. Запросы перехватываются без
+выполнения, затем для каждого берётся EXPLAIN QUERY PLAN (SQLite) или
+EXPLAIN (Postgres). По умолчанию - временная SQLite со схемой из моделей,
+QUERY_PLANS_URL - БД с накатанными миграциями:
+
+    QUERY_PLANS_URL=postgresql://... python -m pytest tests/test_query_plans.py
+"""
+import asyncio
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import services
+from app.models import Base
+from app.services import export
+
+
+class _EmptyResult:
+    def __init__(self, row=None):
+        self.row = row
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return []
+
+    def mappings(self):
+        return self
+
+    def one_or_none(self):
+        return self.row
+
+    def __iter__(self):
+        return iter(())
+
+
+class RecordingSession:
+    """
+    Подменяет AsyncSession: запоминает statement с параметрами и ничего не
+    выполняет. scalar и row - что вернуть из scalar() и one_or_none(),
+    чтобы загрузчик дошёл до следующих запросов.
+    """
+
+    def __init__(self, dialect, scalar=None, row=None):
+        self.dialect = dialect
+        self.info = {}
+        self.statements = []
+        self._scalar = scalar
+        self._row = row
+
+    def get_bind(self):
+        return self
+
+    async def connection(self):
+        return self
+
+    async def execute(self, statement, params=None, *args, **kwargs):
+        self.statements.append((statement, params))
+        return _EmptyResult(self._row)
+
+    async def scalar(self, statement, params=None, *args, **kwargs):
+        self.statements.append((statement, params))
+        return self._scalar
+
+    async def scalars(self, statement, params=None, *args, **kwargs):
+        self.statements.append((statement, params))
+        return _EmptyResult()
+
+
+async def _export_queries(db, user_id: int):
+    # Сама выгрузка открывает свою сессию и читает потоком - здесь только её запросы
+    for _, query in export._user_queries(user_id):
+        await db.execute(query)
+
+
+def _queries():
+    cursor = services.encode_cursor(datetime.utcnow(), 1)
+    note = SimpleNamespace(version=5, name="n", text="t", updated_at=datetime.utcnow())
+    return {
+        "note.get_all_notes": (services.get_all_notes, (cursor, 50), {}),
+        "note.get_note_by_id": (services.get_note, (1,), {}),
+        "note.get_note_by_user_id": (services.get_notes_by_user, (1, None, 50), {}),
+        "note.get_note_by_user_id+cursor": (services.get_notes_by_user, (1, cursor, 50), {}),
+        "note.get_note_by_user_id?view=summary": (services.get_notes_by_user, (1, None, 50, "summary"), {}),
+        "note.get_notes_by_folder_id": (services.get_notes_by_folder, (1, 1, None, 50), {}),
+        "note.get_notes_by_folder_id+cursor": (services.get_notes_by_folder, (1, 1, cursor, 50), {}),
+        "note.get_note_by_slug": (services.get_note_by_slug, ("note_x",), {}),
+        "note.get_note_summaries": (services.get_note_summaries, (1, [1, 2, 3]), {}),
+        "note.search_notes": (services.search_notes, (1, "заметка", 20), {}),
+        "note.get_note_revisions": (services.get_revisions, (1, 1, None, 50), {"scalar": 5}),
+        "note.get_note_revisions+cursor": (services.get_revisions, (1, 1, "3", 50), {"scalar": 5}),
+        "note.get_note_revision": (services.get_revision, (1, 1, 2), {"row": note}),
+        "note.move_notes": (services.move_notes, (1, [1, 2, 3], None), {}),
+        "note.del_notes_by_id": (services.delete_notes, (1, [1, 2, 3]), {}),
+        "export.export": (_export_queries, (1,), {}),
+        "sync.get_changes": (services.get_changes, (1, 0, 50), {}),
+        "sync.get_changes?since": (services.get_changes, (1, 10, 50), {}),
+        "folder.get_folder_by_id": (services.get_folder, (1,), {}),
+        "folder.get_folder_by_slug": (services.get_folder_by_slug, ("folder_x",), {}),
+        "folder.get_folders_by_user_id": (services.get_folders_by_user, (1, None, 50), {}),
+        "folder.get_folders_by_user_id+cursor": (services.get_folders_by_user, (1, cursor, 50), {}),
+    }
+
+
+QUERIES = _queries()
+# Сортировка по релевантности индексом не обслуживается - сортируются только найденные строки
+RANKED = {"note.search_notes"}
+
+
+def explain(conn, statement, params=None):
+    # render_postcompile раскрывает IN (...) в отдельные параметры
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    if isinstance(params, list):
+        # executemany: план одинаков для всех строк
+        params = params[0]
+    values = compiled.construct_params(params)
+    if conn.dialect.name == "sqlite":
+        values = tuple(
+            value.isoformat(" ") if isinstance(value, datetime) else value
+            for value in (values[name] for name in compiled.positiontup)
+        )
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", values).all()
+        return [row[-1] for row in rows]
+
+    rows = conn.exec_driver_sql(f"EXPLAIN {compiled}", values).all()
+    return [row[0] for row in rows]
+
+
+def problems(plan, dialect, allow_sort: bool = False):
+    if dialect == "sqlite":
+        return [line for line in plan if
+                (line.startswith("SCAN ") and " USING " not in line and "VIRTUAL TABLE INDEX" not in line)
+                or ("TEMP B-TREE" in line and not allow_sort)]
+    return [line for line in plan if
+            "Seq Scan" in line or (line.strip().startswith("Sort") and not allow_sort)]
+
+
+@pytest.fixture(scope="module")
+def conn(tmp_path_factory):
+    url = os.environ.get("QUERY_PLANS_URL")
+    if url:
+        engine = create_engine(url)
+    else:
+        engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+        Base.metadata.create_all(engine)
+
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql("SET enable_seqscan = off")
+        yield connection
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", list(QUERIES))
+def test_query_uses_indexes(conn, name):
+    loader, args, results = QUERIES[name]
+    session = RecordingSession(conn.dialect, **results)
+    asyncio.run(loader(session, *args))
+    assert session.statements, f"{name} не выполнил ни одного запроса"
+
+    for statement, params in session.statements:
+        plan = explain(conn, statement, params)
+        bad = problems(plan, conn.dialect.name, allow_sort=name in RANKED)
+        assert not bad, f"{name}: {bad}\n{statement}\n" + "\n".join(plan)
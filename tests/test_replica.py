@@ -0,0 +1,75 @@
+"""
+Маршрутизация чтений (get_read_db): реплика - копия основной SQLite,
+снятая до записи и дальше не обновляемая, то есть реплика с бесконечным
+отставанием. По ответу видно, с какой базы он пришёл.
+"""
+import sqlite3
+import time
+from collections import Counter
+
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import database
+from app.config import Config
+from app.main import app
+
+WINDOW = 0.5
+
+
+@pytest.fixture
+def replica(logged_in, tmp_path, monkeypatch):
+    """Счётчик запросов по базам, пока чтения идут на копию основной базы"""
+    path = tmp_path / "replica.db"
+    with sqlite3.connect(make_url(Config.DB_URL).database) as source, sqlite3.connect(path) as target:
+        source.backup(target)
+
+    # NullPool: соединения не переживают цикл событий TestClient
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    monkeypatch.setattr(database, "ReadSessionLocal", async_sessionmaker(
+        engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    ))
+    monkeypatch.setattr(Config, "READ_YOUR_WRITES_SECONDS", WINDOW)
+
+    queries = Counter()
+    listeners = [
+        (engine.sync_engine, lambda *args: queries.update(["replica"])),
+        (database.async_engine.sync_engine, lambda *args: queries.update(["primary"])),
+    ]
+    for target, listener in listeners:
+        event.listen(target, "after_cursor_execute", listener)
+    yield queries
+    for target, listener in listeners:
+        event.remove(target, "after_cursor_execute", listener)
+
+
+def _read_notes(client, queries, user_id: int, note_id: int):
+    before = queries.copy()
+    response = client.get(f"/note/by_user/{user_id}/", params={"view": "summary"})
+    assert response.status_code == 200, response.text
+    served = [name for name in ("primary", "replica") if queries[name] > before[name]]
+    return served, any(item["id"] == note_id for item in response.json()["items"])
+
+
+def test_reads_follow_recent_writes(logged_in, replica):
+    author_id = jwt.get_unverified_claims(logged_in.cookies["access_token"])["id"]
+    other = TestClient(app, base_url="https://testserver")
+    other.post("/auth/register", data={"login": "reader", "password": "secret", "confirm_password": "secret"})
+    assert other.post("/auth/token", data={"username": "reader", "password": "secret"}).status_code == 200
+    other_id = jwt.get_unverified_claims(other.cookies["access_token"])["id"]
+
+    note_id = logged_in.post("/note/", json={"name": "replica", "text": "запись"}).json()["id"]
+
+    # Автор сразу после записи читает с основной базы и видит её
+    assert _read_notes(logged_in, replica, author_id, note_id) == (["primary"], True)
+    # Чтения остальных пользователей идут на реплику
+    assert _read_notes(other, replica, other_id, note_id) == (["replica"], False)
+
+    time.sleep(WINDOW)
+    # После окна READ_YOUR_WRITES_SECONDS автор тоже читает с отстающей реплики
+    assert _read_notes(logged_in, replica, author_id, note_id) == (["replica"], False)
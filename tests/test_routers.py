@@ -0,0 +1,43 @@
+import pytest
+
+
+@pytest.mark.parametrize("url", [
+    "/note/slug/missing/",
+    "/folder/slug/missing/",
+    "/note/999999/",
+    "/folder/999999/",
+])
+def test_missing_object_is_404(client, url):
+    response = client.get(url)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Объект не найден"
+
+
+@pytest.mark.parametrize("url", ["/note/999999/", "/folder/999999/"])
+def test_missing_object_with_if_none_match_is_404(client, url):
+    response = client.get(url, headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+
+
+def test_move_missing_note_is_404(logged_in):
+    folder = logged_in.post("/folder/", json={"name": "target", "color": "#fff"}).json()
+    response = logged_in.patch("/note/999999/", params={"folder_id": folder["id"]})
+    assert response.status_code == 404
+
+
+def test_folder_page(logged_in):
+    folder = logged_in.post("/folder/", json={"name": "page", "color": "#fff"}).json()
+    assert logged_in.get(f"/folder/folder_page/{folder['id']}").status_code == 200
+    assert logged_in.get("/folder/folder_page/999999").status_code == 404
+
+
+def test_search_snippet_escapes_note_text(logged_in):
+    text = 'до <img src=x onerror="alert(1)"> уникальнослово после'
+    assert logged_in.post("/note/", json={"name": "xss", "text": text}).status_code == 200
+
+    response = logged_in.get("/note/search", params={"q": "уникальнослово"})
+    assert response.status_code == 200, response.text
+    snippet = response.json()[0]["snippet"]
+    assert "<img" not in snippet
+    assert "&lt;img" in snippet
+    assert "<mark>уникальнослово</mark>" in snippet